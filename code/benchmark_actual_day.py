@@ -0,0 +1,79 @@
+#! usr/bin/env python3
+#############################################################################################
+#The “benchmark_actual_day.py” script
+#This script times the computation of the missing-day gaps in actual_day (tools.missing_day_runs)
+#against the previous implementation, which sliced the prefix and the suffix of the cycle for
+#every missing day. It uses the cycles that nadirs_and_peaks.py processes (same inputs), or
+#synthetic cycles if no inputs are given, and checks that both give the same "Missing_length".
+#############################################################################################
+
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+import tools.tools as tools
+
+parser = argparse.ArgumentParser(description='A script for benchmarking the missing-day gaps in actual_day')
+parser.add_argument('-i','--input_temps', type=str, required=False, help='The input temperatures dataset (as for nadirs_and_peaks.py)')
+parser.add_argument('-j','--input_cycles', type=str, required=False, help='The input cycles dataset (as for nadirs_and_peaks.py)')
+parser.add_argument('-m','--model_cycle', type=str, required=False, help='The location of the model cycle (as for nadirs_and_peaks.py)')
+parser.add_argument('-n','--n_cycles', type=int, default=None, help='The maximum number of cycles to use (DEFAULT: all the cycles)')
+parser.add_argument('-s','--synthetic', type=int, default=1000, help='The number of synthetic cycles if no inputs are given')
+
+def missing_length_previous(temperature_vals):
+    #the previous implementation in actual_day (quadratic in the length of the cycle)
+    temperature_vals["Missing_length"] = 0
+
+    for i in (temperature_vals[temperature_vals["Missing_Day"] == True].index):
+        last_day_before_miss = temperature_vals.iloc[0:i][temperature_vals.iloc[0:i]["Missing_Day"] == False].tail(1).index
+        first_day_after_miss = temperature_vals.iloc[i:][temperature_vals.iloc[i:]["Missing_Day"] == False].head(1).index
+
+        temperature_vals.loc[i, "Missing_length"] = first_day_after_miss - last_day_before_miss - 1
+
+    try:
+        missed = temperature_vals[temperature_vals["Missing_length"] > 10].head(1).index.values[0] #if there are more than 10 missing days
+        temperature_vals = temperature_vals.iloc[0:missed] #drop all recordings after 10 missing days
+    except IndexError:
+        temperature_vals = temperature_vals #otherwise keep all temperatures with the missing dates
+    return temperature_vals
+
+def synthetic_cycles(n_cycles, seed=0):
+    rng = np.random.RandomState(seed)
+    frames = []
+    for c in range(n_cycles):
+        n_days = rng.randint(20, 60)
+        missing = rng.rand(n_days) < 0.2
+        for start in rng.randint(1, n_days - 1, size=rng.randint(0, 3)): #longer gaps
+            missing[start:start + rng.randint(1, 15)] = True
+        missing[[0, -1]] = False
+        frames.append(pd.DataFrame({"key_0": pd.date_range("2020-01-01", periods=n_days),
+                                    "User ID": np.where(missing, np.nan, c), "Cycle ID": np.where(missing, np.nan, c),
+                                    "Mean_Temp": np.where(missing, np.nan, rng.randint(35000, 40000, n_days)),
+                                    "Missing_Day": missing}))
+    return frames
+
+def benchmark(frames):
+    start = time.perf_counter()
+    previous = [missing_length_previous(frame.copy()) for frame in frames]
+    time_previous = time.perf_counter() - start
+
+    start = time.perf_counter()
+    current = [tools.drop_after_missing_gap(frame.copy(), max_gap=10) for frame in frames]
+    time_current = time.perf_counter() - start
+
+    for frame_previous, frame_current in zip(previous, current):
+        pd.testing.assert_frame_equal(frame_previous, frame_current)
+    logger.info(f"{len(frames)} cycles: {time_previous:.3f} s before, {time_current:.3f} s now ({time_previous/time_current:.1f}x faster), identical results")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.input_temps is not None and args.input_cycles is not None:
+        from nadirs_and_peaks import users_cycles_and_temps
+        users, grouped, cycle_temps, _ = users_cycles_and_temps(args.input_temps, args.input_cycles, args.model_cycle)
+        keys = [key for key in grouped.index if key in cycle_temps][:args.n_cycles]
+        frames = [cycle_temps.daily_frame(user, cycle) for user, cycle in keys]
+    else:
+        frames = synthetic_cycles(args.synthetic if args.n_cycles is None else args.n_cycles)
+    benchmark(frames)
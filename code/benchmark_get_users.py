@@ -0,0 +1,68 @@
+#! usr/bin/env python3
+#############################################################################################
+#The “benchmark_get_users.py” script
+#This script times the enumeration of the users of a grouped dataset (tools.get_users and 
+#tools.get_users_cycles) against the previous implementation, which checked every row of the 
+#index against the list of the users found so far. It uses a synthetic index of users and 
+#cycles (1M rows by default) and checks that both give the same users in the same order. The 
+#previous implementation is quadratic, so it is only timed on the first rows of the index.
+#############################################################################################
+
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+import tools.tools as tools
+
+parser = argparse.ArgumentParser(description='A script for benchmarking the enumeration of the users')
+parser.add_argument('-n','--n_rows', type=int, default=1000000, help='The number of rows of the synthetic index')
+parser.add_argument('-u','--n_users', type=int, default=10000, help='The number of users of the synthetic index')
+parser.add_argument('-p','--previous_rows', type=int, default=100000, help='The number of rows the previous implementation is timed on')
+
+def get_users_previous(grouped_data):
+    #the previous implementation of tools.get_users
+    usershat = []
+    for key, group in grouped_data.index:
+        if key not in usershat:
+            usershat.append(key)
+    return usershat
+
+def get_users_cycles_previous(grouped_data):
+    #the previous implementation of tools.get_users_cycles
+    usershat = []
+    for key in grouped_data.index:
+        if key not in usershat:
+            usershat.append(key)
+    return usershat
+
+def synthetic_grouped(n_rows, n_users, seed=0):
+    #a dataset grouped by users and cycles (sorted by user, as from groupby), and its cycle counts by user
+    rng = np.random.RandomState(seed)
+    users = np.sort(rng.randint(0, n_users, n_rows))
+    cycles = np.arange(n_rows)
+    index = pd.MultiIndex.from_arrays([pd.Index(users).map("user{}".format), pd.Index(cycles).map("cycle{}".format)],
+                                      names=["User ID_y", "Cycle ID"])
+    grouped = pd.DataFrame({"Date_x": np.zeros(n_rows)}, index=index)
+    counts = grouped.groupby(level=0).count()
+    return grouped, counts
+
+def timed(function, data):
+    start = time.perf_counter()
+    result = function(data)
+    return result, time.perf_counter() - start
+
+def benchmark(name, current, previous, data, previous_data):
+    users, time_current = timed(current, data)
+    users_previous, time_previous = timed(previous, previous_data)
+    assert current(previous_data) == users_previous
+    logger.info(f"{name}: {len(data)} rows in {time_current:.3f} s now ({len(users)} users); "
+                f"{len(previous_data)} rows in {time_previous:.3f} s before "
+                f"({time_previous/len(previous_data)/(time_current/len(data)):.0f}x slower per row), identical results")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    grouped, counts = synthetic_grouped(args.n_rows, args.n_users)
+    benchmark("get_users", tools.get_users, get_users_previous, grouped, grouped.iloc[:args.previous_rows])
+    benchmark("get_users_cycles", tools.get_users_cycles, get_users_cycles_previous, counts, counts.iloc[:args.previous_rows])
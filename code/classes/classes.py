@@ -4,6 +4,7 @@ import os
 from loguru import logger
 import glob
 import tools.tools as tools
+import tools.storage as storage
 
 class Frames:
     def __init__(self, df):
@@ -11,29 +12,14 @@ class Frames:
         
     def recode_pcos(self):
         the_df = self.df
-
-        for i in range(len(the_df)):
-            if (the_df.loc[i, "PCOS"] == "Polycystic Ovarian Syndrome (PCOS)"): # One person indicated PCOS but didnt answer
-                the_df.loc[i, "PCOS"] = 1                                     # "Yes" to infertility
-
-            elif (the_df.loc[i, "Have you ever gone to a doctor because you thought you were infertile?"] == "Yes") \
-            & (the_df.loc[i, "PCOS"] != "Polycystic Ovarian Syndrome (PCOS)"):
-                the_df.loc[i, "PCOS"] = 0 # Those that answered yes to infertility but do not have PCOS
-            
-            elif (the_df.loc[i, "Have you ever gone to a doctor because you thought you were infertile?"] == "No"):
-                the_df.loc[i, "PCOS"] = 0 # Some answered "No" to infertility in the "Yes" column
-                
-            elif (the_df.loc[i, "Unnamed: 676"] == "No"):
-                the_df.loc[i, "PCOS"] = 0 # Those that indicated "No to infertility"
-                
-            else:
-                the_df.loc[i, "PCOS"] = 2 # Those with no response to infertility question
+        #the labels as objects, as they were set row by row (they stay integers when merged with missing values)
+        the_df["PCOS"] = pd.Series(tools.pcos_labels(the_df), index=the_df.index, dtype=object)
         return the_df
 
     def the_cycles_temp_dates_duration(self):
         temp_dates_duration = self.df
-        cycles = pd.read_csv(
-            temp_dates_duration, usecols = ["Cycle ID", "Data_Dur", "Date_x", "User ID_y", "Offset", "Date_Diff", "Ovulation Day"]
+        cycles = storage.read_frame(
+            temp_dates_duration, columns = ["Cycle ID", "Data_Dur", "Date_x", "User ID_y", "Offset", "Date_Diff", "Ovulation Day"]
             )
         cycles = cycles.sort_values("Date_x")
         return cycles
@@ -48,36 +34,48 @@ class Frames:
         df = pd.read_excel(excel_file,  skiprows=2)
         return df
 
-    def read_temp(self):
+    def read_temp(self, users=None, cycles=None, categorical_ids=False):
+        #users, cycles: only the temperatures of these users and/or cycles are loaded (e.g. the shard of a worker)
+        #categorical_ids: the user and cycle IDs as categoricals (less memory; to be grouped with observed=True)
         INPUT_TEMPS = self.df
-        chunk_temperatures = pd.read_csv(
+        chunk_temperatures = storage.read_frame_chunks(
             INPUT_TEMPS, 
-            usecols=["prime","Cycle ID","Start Time","Mean_Temp","Date","Time"],
+            columns=["prime","Cycle ID","Start Time","Mean_Temp","Date","Time"],
             chunksize=50000
             )
-        temperatures = pd.concat(chunk_temperatures)
-        temperatures["User ID"] = temperatures["prime"].apply(lambda x: x.split("_")[0])
-        temp_sort = temperatures.sort_values(["Date", "Time"]).reset_index(drop = True)
-        #temp_sort["Cycle ID"] = temp_sort["Cycle ID"].apply(lambda x: x.lower())
-        temp_sort["Cycle ID"] = temp_sort["Cycle ID"]
-        
-        temp_sort["Mean_Temp"] = temp_sort["Mean_Temp"].apply(lambda x: int(x)) #convert data to integer type
-        temp_sort_final = temp_sort[(temp_sort["Mean_Temp"] > 35000) & (temp_sort["Mean_Temp"] < 40000)] #ensures that true values are selected
+
+        #every chunk is filtered before the chunks are concatenated
+        temperatures = []
+        for chunk in chunk_temperatures:
+            chunk["User ID"] = chunk["prime"].str.split("_", n=1).str[0]
+            if users is not None:
+                chunk = chunk[chunk["User ID"].isin(users)]
+            if cycles is not None:
+                chunk = chunk[chunk["Cycle ID"].isin(cycles)]
+            chunk["Mean_Temp"] = chunk["Mean_Temp"].astype(np.int64) #convert data to integer type
+            temperatures.append(chunk[(chunk["Mean_Temp"] > 35000) & (chunk["Mean_Temp"] < 40000)]) #ensures that true values are selected
+        temperatures = pd.concat(temperatures)
+
+        if categorical_ids:
+            temperatures["User ID"] = temperatures["User ID"].astype("category")
+            temperatures["Cycle ID"] = temperatures["Cycle ID"].astype("category")
+        #the sort by several columns is stable, so the rows are in the same order as when filtered after the sort
+        temp_sort_final = temperatures.sort_values(["Date", "Time"]).reset_index(drop = True)
 
         return temp_sort_final
 
     def read_cycles_and_pcos(self):
         INPUT_CYCLES_PCOS = self.df
-        cycles = pd.read_csv(
-            INPUT_CYCLES_PCOS, usecols = ["Cycle ID", "Data_Dur", "Date_x", "User ID_y", "Offset", "Date_Diff", "Ovulation Day", "PCOS", "cycle_compl"]
+        cycles = storage.read_frame(
+            INPUT_CYCLES_PCOS, columns = ["Cycle ID", "Data_Dur", "Date_x", "User ID_y", "Offset", "Date_Diff", "Ovulation Day", "PCOS", "cycle_compl"]
             )
         cycles = cycles.sort_values("Date_x")
         return cycles
 
     def read_user_level_data(self):
         INPUT_USER_LEVEL = self.df
-        user_data = pd.read_csv(
-            INPUT_USER_LEVEL, usecols = ["User", "PCOS"]
+        user_data = storage.read_frame(
+            INPUT_USER_LEVEL, columns = ["User", "PCOS"]
             )
         return user_data
 
@@ -86,15 +84,8 @@ class Frames:
         ALL_EVENTS_PATH = os.path.join(ALL_EVENTS_FOLDER, "alluserevents*")
         ALL_EVENTS_FILE = glob.glob(ALL_EVENTS_PATH)
 
-        #combine the allusercycles files
-        events_df = pd.DataFrame()
-        for file in  ALL_EVENTS_FILE:
-            event_data = pd.read_csv(file)
-            events_df = pd.concat([events_df, event_data], axis=0)
-            dataset_name = file.split("/")[-1]
-            logger.info(dataset_name+" loaded")
-
-        events_df["Date"] = pd.to_datetime(events_df["Date"])
+        #combine the alluserevents files
+        events_df = storage.read_shards(ALL_EVENTS_FILE, parse_dates=["Date"])
         events_df = events_df.sort_values("Date").reset_index(drop = True)
         period_events = events_df[events_df["Event Type"] == "period"]
         return (period_events)
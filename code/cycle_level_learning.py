@@ -21,6 +21,7 @@ from classes.strat_k_fold import StratKFold
 from tools.classifier_roc_cross_val import classifier_roc_cross_val
 from tools.classifier_importance import plot_importance
 from tools.classifier_importance import shap_explainer
+import tools.storage as storage
 
 parser = argparse.ArgumentParser(description= "A script to filter data")
 parser.add_argument('-i', '--input_file', type=str, required=True, help= 'The input dataset')
@@ -30,7 +31,7 @@ parser.add_argument('-o', '--output_folder', type=str, required=True, help= 'The
 def cycle_level_learning(INPUT, SPLITS, OUTPUT):
     #reading the data
     logger.info("Reading cycle level variables for learning")
-    df = pd.read_csv(INPUT)
+    df = storage.read_frame(INPUT)
     renaming = {#Features derived directly from processed-unstandardised cycle data 
         'Data_Length':'Data length',
         'Next Cycle Difference':'Cycle length',
@@ -12,6 +12,11 @@
 #dropping duplicates using the primary key (generated by combining the user ID and the start
 #time) while keeping the first row (the row with the least number of null columns, 
 #correspondingly, the most complete row).
+#The datasets are read one at a time, twice: the first pass only keeps a hash of every row, 
+#the codes of its primary key (the user ID and the start time as integer codes) and its number 
+#of null values, from which the rows to keep are found; the second appends the kept rows of 
+#every dataset to the output, so the combined dataset is never held in memory. The number of 
+#rows dropped at every stage is logged.
 #Lastly, improperly formatted data columns are cleaned (some data columns are formatted by 
 #starting with “Bin”, these seem to cause errors) by sub-setting the portions of the needed 
 #string.
@@ -23,59 +28,107 @@ import os, sys
 from loguru import logger
 import glob
 import argparse
+import tools.storage as storage
 pd.options.mode.chained_assignment = None 
 
 
 parser = argparse.ArgumentParser(description='A script for initial data cleaning')
 parser.add_argument('-i','--input_folder', type=str, required=True, help='The input dataset')
 parser.add_argument('-o','--output_file', type=str, required=True, help='The output file')
+parser.add_argument('-w','--workers', type=int, default=2, help='The number of datasets read at once (each one is held in memory) (DEFAULT: 2)')
 
 
 def remove_bin(df):
-   for i in range(len(df)):
-    if df.loc[i, "Data"].startswith("Bin"):
-        df.loc[i, "Data"] = df.loc[i, "Data"][10:522]
-   return df
+    #the improperly formatted data (starting with "Bin") are cut to the needed portion
+    is_bin = df["Data"].str.startswith("Bin", na=False)
+    df.loc[is_bin, "Data"] = df.loc[is_bin, "Data"].str[10:522]
+    return df, int(is_bin.sum())
 
-   
-def dat_clean(INPUT_FOLDER, OUTPUT_FILE):
+#Stable integer codes of the values of a column across the datasets (the categories grow with every dataset),
+#so that the primary key (the user ID and the start time) is a pair of integers instead of a string
+class Codes:
+    def __init__(self):
+        self.categories = None
+
+    def __call__(self, values):
+        if self.categories is None:
+            self.categories = pd.Index(pd.unique(values))
+        else:
+            new = pd.Index(pd.unique(values)).difference(self.categories, sort=False)
+            if len(new) > 0:
+                self.categories = self.categories.append(new)
+        return self.categories.get_indexer(values)
+
+def read_recordings(file):
+    return pd.read_csv(file, parse_dates=['Start Time'])
+
+def primary_key(rec):
+    return (rec["User ID"]).astype(str)+"_"+(rec["Start Time"]).astype(str)
+
+def recording_keys(file):
+    #what is needed of a dataset to find the rows to keep: the hash of every recording (to count the full duplicates),
+    #its primary key, its number of null values and whether it has data
+    rec = read_recordings(file)
+    return pd.DataFrame({"hash": pd.util.hash_pandas_object(rec, index=False).to_numpy(),
+                         "User ID": rec["User ID"].to_numpy(), "Start Time": rec["Start Time"].to_numpy(),
+                         "count": rec.isnull().sum(1).to_numpy(), "has_data": rec["Data"].notnull().to_numpy(),
+                         "row": np.arange(len(rec))})
+
+def row_keys(ALL_FILES, workers):
+    #the keys of the recordings of all the datasets (read concurrently), with the primary key as codes and the dataset
+    user_codes, start_codes = Codes(), Codes()
+    keys = []
+    for f, file_keys in enumerate(storage.map_shards(ALL_FILES, recording_keys, workers)):
+        file_keys["user"] = user_codes(file_keys.pop("User ID"))
+        file_keys["start"] = start_codes(file_keys.pop("Start Time"))
+        file_keys["file"] = f
+        keys.append(file_keys)
+    columns = ["hash", "count", "has_data", "row", "user", "start", "file"]
+    return pd.concat(keys, ignore_index=True) if len(keys) > 0 else pd.DataFrame(columns=columns)
+
+def kept_rows(keys, counters):
+    #the rows kept (the dataset and the row of the most complete recording of every primary key, the first of
+    #the equally complete ones), with the rows dropped at every stage in counters.
+    #The rows kept are decided by the primary key only: a full duplicate has the primary key, the number of null
+    #values and the data of the row it duplicates, so it is dropped with the partial duplicates. The hash only tells
+    #the full duplicates apart in the counters (rows with the same primary key whose hashes collide would be
+    #counted as full duplicates instead of partial ones, but no recording can be dropped because of a collision).
+    kept = keys[keys["has_data"]].sort_values(["count", "file", "row"], kind="stable").drop_duplicates(["user", "start"], keep="first")
+
+    unique = keys[~keys.duplicated(["hash", "user", "start"])]
+    counters["full_duplicates"] = len(keys) - len(unique)
+    with_data = unique[unique["has_data"]]
+    counters["null_data"] = len(unique) - len(with_data)
+    counters["partial_duplicates"] = len(with_data) - len(kept)
+    return kept
+
+def dat_clean(INPUT_FOLDER, OUTPUT_FILE, workers=2):
     FILES_PATHS = os.path.join(INPUT_FOLDER, "alluserrecordings*")
-    ALL_FILES = glob.glob(FILES_PATHS)
+    ALL_FILES = sorted(glob.glob(FILES_PATHS)) #the kept rows are written in the order of the datasets
 
-    rec_full  = pd.DataFrame()
     logger.info("loading the datasets...\n")
+    keys = row_keys(ALL_FILES, workers)
+    counters = {"recordings": len(keys)}
+    kept = kept_rows(keys, counters)
+    del keys
+    for stage in ("full_duplicates", "null_data", "partial_duplicates"):
+        logger.info(f"{stage}: {counters[stage]} rows dropped \n")
 
-    for file in ALL_FILES:
-        rec = pd.read_csv(file, parse_dates=['Start Time'])
-        rec_full = pd.concat([rec_full, rec], axis = 0)
-        dataset_name = file.split("/")[-1]
-        logger.info(dataset_name, "loaded \n")
-
-    logger.info("Datasets merged \n")
-
-    rec_full_unique = rec_full.drop_duplicates()
-    logger.info("Full duplicates dropped \n")
-
-    rec_clean = rec_full_unique.dropna(subset=['Data'])
-    logger.info("Null values dropped \n")
-
-    rec_clean["prime"] = (rec_clean["User ID"]).astype(str)+"_"+(rec_clean["Start Time"]).astype(str)
-    logger.info("Primary key created \n")
-
-    rec_clean['count'] = rec_clean.isnull().sum(1)
-    rec_clean_t = rec_clean.sort_values(['count']).drop_duplicates(subset=['prime'],keep='first').drop(columns = 'count')
-    logger.info("Partial duplicates dropped \n")
-    
-    rec_clean_t.reset_index(drop=True, inplace=True)
-    logger.info("Index reset \n")
-    
-    cleaned = remove_bin(rec_clean_t)
-    logger.info("Improperly formated data removed \n")
-    
-    #cleaned.to_csv(os.path.join(OUTPUT_FOLDER, "data_cleaned.csv"))
-    cleaned.to_csv(OUTPUT_FILE)
-    logger.info("Data succesfully cleaned and saved")
+    #the datasets are read again, one at a time, and their kept rows appended to the output
+    counters["bin_data"] = 0
+    with storage.FrameWriter(OUTPUT_FILE) as cleaned:
+        for f, rec in enumerate(storage.map_shards(ALL_FILES, read_recordings, workers)):
+            rows = np.sort(kept["row"].to_numpy()[kept["file"].to_numpy() == f])
+            rec_clean = rec.iloc[rows].reset_index(drop=True)
+            rec_clean["prime"] = primary_key(rec_clean)
+            rec_clean, n_bin = remove_bin(rec_clean)
+            counters["bin_data"] += n_bin
+            cleaned.write(rec_clean)
+    counters["cleaned"] = len(kept)
+    logger.info(f"bin_data: {counters['bin_data']} improperly formated data cut \n")
+    logger.info(f"Data succesfully cleaned and saved {counters}")
+    return counters
 
 if __name__ == "__main__":
     args = parser.parse_args()
-    dat_clean(args.input_folder, args.output_file)
\ No newline at end of file
+    dat_clean(args.input_folder, args.output_file, args.workers)
\ No newline at end of file
@@ -0,0 +1,44 @@
+#! usr/bin/env python3
+
+#############################################################################################
+#The “decode_recordings.py” script
+#The script expects the cleaned temperature recordings from the "data_clean" rule (data_cleaned.csv) 
+#and will output them with the nightly temperatures decoded, as the "data_decrypt" (decrypt.js) and 
+#"merged_decrypted" (decrypt_merge_2.py) rules do together. The base64 "Data" of every record is 
+#decoded to bytes and every two bytes to a temperature with NumPy bit operations (as byteToRecordingTemp 
+#in decrypt.js), for all the records at once. The "Data" column of the output is the list of the 
+#temperatures of every record (an integer list column in Parquet), so no chunked CSVs are written 
+#and parsed again.
+#############################################################################################
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+import argparse
+
+import tools.storage as storage
+from tools.recordings import recordings_to_temperatures
+
+parser = argparse.ArgumentParser(description='A script for decoding the temperature recordings')
+parser.add_argument('-i','--input_file', type=str, required=True, help='The cleaned recordings (from dat_clean)')
+parser.add_argument('-o','--output_file', type=str, required=True, help='The output file')
+
+
+def decode_recordings(INPUT_FILE, OUTPUT_FILE):
+    logger.info("Loading dataset for decoding...")
+    recordings = storage.read_frame(INPUT_FILE)
+    recordings = recordings.drop(columns=["Unnamed: 0"], errors="ignore") #the index written by dat_clean
+
+    offsets, temperatures = recordings_to_temperatures(recordings["Data"])
+    records = np.split(temperatures, offsets[1:-1])
+    if storage.is_csv(OUTPUT_FILE):
+        records = [record.tolist() for record in records] #written as the lists decrypt_merge_2 writes
+    recordings["Data"] = records
+    logger.info(f"{len(recordings)} records decoded ({len(temperatures)} temperatures)")
+
+    storage.write_frame(recordings, OUTPUT_FILE)
+    logger.info("Data decoding ended")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    decode_recordings(args.input_file, args.output_file)
@@ -231,11 +231,16 @@ def dba(s, c, mask=None, samples=None, use_c=False, nb_initial_samples=None, use
             c = get_good_c(s, mask, nb_initial_samples, use_c=use_c, **kwargs)
     t = len(c)
     assoctab = [[] for _ in range(t)]
+    if use_dtw_missing: # compare c to all sequences at once (with the compiled DTW-AROW if available, which gives identical results)
+        paths = iter(dtw_m.distances_to_many(c, [seq for idx, seq in enumerate(s) if mask[idx]], return_optimal_warping_paths=True, 
+                                             use_c=dtw_m.dtw_missing_numba is not None, **kwargs)[1])
     for idx, seq in enumerate(s):
         if mask is not None and not mask[idx]:
             continue
         if use_c:
             m = dtw_cc.warping_path(c, seq, **kwargs)
+        elif use_dtw_missing:
+            m = next(paths)
         else:
             m = warping_path(c, seq, use_dtw_missing=use_dtw_missing, **kwargs)
         for i, j in m:
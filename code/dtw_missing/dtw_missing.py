@@ -8,6 +8,13 @@ import dtw_missing.missing_utils as mus
 
 logger = logging.getLogger("be.kuleuven.dtw_missing")
 
+dtw_missing_numba = None
+try:
+    from dtw_missing import dtw_missing_numba
+except ImportError:
+    logger.debug('Numba not available, the compiled implementation of DTW-AROW cannot be used')
+    dtw_missing_numba = None
+
 inf = float("inf")
 
 argmin = np.argmin
@@ -19,6 +26,7 @@ argmax = np.argmax
 MISSING_FUN_DEFAULT = lambda s: np.isnan(s).any(axis=tuple(range(1, s.ndim))) # the first dimension is time
 
 COST_OF_MISSING = 0 # cost of a comparison between two time instants that involves any missing values
+PRUNING_TOLERANCE = 1e-9 # relative tolerance on the distance to the nearest candidate when pruning with lower bounds (see distances_to_nearest)
 
 def warping_paths(s1, s2, window=None, max_dist=None, use_pruning=False,
                   max_step=None, max_length_diff=None, penalty=None, psi=None, psi_neg=True,
@@ -28,7 +36,8 @@ def warping_paths(s1, s2, window=None, max_dist=None, use_pruning=False,
                   missing_value_restrictions="full", 
                   missing_value_adjustment="proportion_of_missing_values", 
                   missing_fun=None, 
-                  return_optimal_warping_path=False):
+                  return_optimal_warping_path=False, 
+                  precomputed_costs=None):
     """
     Dynamic Time Warping (DTW) that can handle missing values.
     
@@ -59,7 +68,8 @@ def warping_paths(s1, s2, window=None, max_dist=None, use_pruning=False,
     :param penalty: see :meth:`distance`
     :param psi: see :meth:`distance`
     :param psi_neg: Replace values that should be skipped because of psi-relaxation with -1.
-    :param use_c: Use the C implementation instead of Python
+    :param use_c: Use the compiled (Numba) implementation instead of Python. 
+                  Gives identical results; falls back to Python if Numba is not available.
     :param use_ndim: The input series is >1 dimensions.
         Use cost = SquaredEuclideanDistance(s1[i], s2[j])
     :param inner_dist: Distance between two points in the time series.
@@ -84,12 +94,16 @@ def warping_paths(s1, s2, window=None, max_dist=None, use_pruning=False,
     :param missing_fun: function (applied on s1 and s2) to check whether each time instant is missing or not
                         (DEFAULT: None: consider a time instant as missing if any dimension has a missing value np.nan)
     :param return_optimal_warping_path: Return the optimal warping path.
+    :param precomputed_costs: Costs of all comparisons as returned by calculate_cost_matrix (only used if use_c=True). 
+                              Unlike cost_matrix, it does not change the computation (e.g., the restrictions on warping); 
+                              it only avoids computing the costs again (see distances_to_many).
     :returns: (DTW distance, DTW matrix)                       if return_optimal_warping_path==False, 
               (DTW distance, DTW matrix, optimal warping path) if return_optimal_warping_path==True.
     """
-    if use_c:
-        msg = "C implementation for DTW-AROW is not available"
+    if use_c and dtw_missing_numba is None:
+        msg = "Compiled implementation for DTW-AROW is not available (requires Numba), continuing with the Python implementation"
         logger.warning(msg)
+        use_c = False
     if np is None:
         raise NumpyException("Numpy is required for the warping_paths method")
     
@@ -144,7 +158,12 @@ def warping_paths(s1, s2, window=None, max_dist=None, use_pruning=False,
     s2_isavailable = ~missing_fun(s2)
     
     if psi is None and cost_matrix is None and missing_value_restrictions in ['full', 'partial']:
-        custom_left_right_bounds, constrained_warping_path_possible = calculate_missing_bounds_fast(s1, s2, missing_fun, missing_value_restrictions)
+        if use_c:
+            left_bounds, right_bounds, constrained_warping_path_possible = dtw_missing_numba.missing_bounds(~np.asarray(s1_isavailable, dtype=bool), ~np.asarray(s2_isavailable, dtype=bool), 
+                                                                                                           missing_value_restrictions == 'partial')
+            custom_left_right_bounds = [left_bounds, right_bounds]
+        else:
+            custom_left_right_bounds, constrained_warping_path_possible = calculate_missing_bounds_fast(s1, s2, missing_fun, missing_value_restrictions)
         if not constrained_warping_path_possible:
             if return_optimal_warping_path:
                 return inf, None, None
@@ -171,71 +190,96 @@ def warping_paths(s1, s2, window=None, max_dist=None, use_pruning=False,
         dtw[i, 0] = 0
     i0 = 1
     i1 = 0
-    sc = 0
-    ec = 0
-    smaller_found = False
-    ec_next = 0
-    for i in range(r):
-        i0 = i
-        i1 = i + 1
+    if use_c:
+        if cost_matrix is not None:
+            cost_matrix_c = np.asarray(cost_matrix)
+        elif precomputed_costs is not None:
+            cost_matrix_c = precomputed_costs
+        else:
+            cost_matrix_c = calculate_cost_matrix(s1, s2, inner_dist=inner_dist, s1_isavailable=s1_isavailable, s2_isavailable=s2_isavailable)
+        if max_step < inf:
+            dtype_step = np.result_type(cost_matrix_c.dtype.type(0), max_step) # compare in the same precision as the Python implementation does
+            step_exceeded = cost_matrix_c.astype(dtype_step) > max_step
+        else:
+            step_exceeded = np.zeros((r, c), dtype=bool)
         if custom_left_right_bounds is None:
-            j_start = max(0, i - max(0, r - c) - window + 1)
-            j_end = min(c, i + max(0, c - r) + window)
+            left_bounds = right_bounds = np.zeros(0, dtype=np.int64)
         else:
-            j_start = custom_left_right_bounds[0][i]
-            j_end = custom_left_right_bounds[1][i] + 1 # "+1" because the range function does not include the right bound
-        if sc > j_start:
-            j_start = sc
+            left_bounds = np.asarray(custom_left_right_bounds[0], dtype=np.int64)
+            right_bounds = np.asarray(custom_left_right_bounds[1], dtype=np.int64)
+        i1 = dtw_missing_numba.warping_paths_loop(dtw, steps if calculate_optimal_warping_path else np.empty((0, 0)),
+                                                  cost_matrix_c.astype(np.float64), step_exceeded,
+                                                  np.asarray(s1_isavailable, dtype=bool), np.asarray(s2_isavailable, dtype=bool),
+                                                  left_bounds, right_bounds, custom_left_right_bounds is not None,
+                                                  int(window), float(penalty), float(max_dist),
+                                                  missing_restrict, missing_restrict and missing_restrict_partial,
+                                                  calculate_optimal_warping_path)
+    else:
+        sc = 0
+        ec = 0
         smaller_found = False
-        ec_next = i
-        # jmin = max(0, i - max(0, r - c) - window + 1)
-        # jmax = min(c, i + max(0, c - r) + window)
-        # print(i,jmin,jmax)
-        # x = dtw[i, jmin-skipp:jmax-skipp]
-        # y = dtw[i, jmin+1-skipp:jmax+1-skipp]
-        # print(x,y,dtw[i+1, jmin+1-skip:jmax+1-skip])
-        # dtw[i+1, jmin+1-skip:jmax+1-skip] = np.minimum(x,
-        #                                                y)
-        for j in range(j_start, j_end):
-            # print('j =', j, 'max=',min(c, c - r + i + window))
-            if cost_matrix is None:
-                if s1_isavailable[i] and s2_isavailable[j]:
-                    d = cost(s1[i], s2[j])
-                else:
-                    d = COST_OF_MISSING
+        ec_next = 0
+        for i in range(r):
+            i0 = i
+            i1 = i + 1
+            if custom_left_right_bounds is None:
+                j_start = max(0, i - max(0, r - c) - window + 1)
+                j_end = min(c, i + max(0, c - r) + window)
             else:
-                d = cost_matrix[i, j]
-            if max_step is not None and d > max_step:
-                continue
-            # print(i, j + 1 - skip, j - skipp, j + 1 - skipp, j - skip)
+                j_start = custom_left_right_bounds[0][i]
+                j_end = custom_left_right_bounds[1][i] + 1 # "+1" because the range function does not include the right bound
+            if sc > j_start:
+                j_start = sc
+            smaller_found = False
+            ec_next = i
+            # jmin = max(0, i - max(0, r - c) - window + 1)
+            # jmax = min(c, i + max(0, c - r) + window)
+            # print(i,jmin,jmax)
+            # x = dtw[i, jmin-skipp:jmax-skipp]
+            # y = dtw[i, jmin+1-skipp:jmax+1-skipp]
+            # print(x,y,dtw[i+1, jmin+1-skip:jmax+1-skip])
+            # dtw[i+1, jmin+1-skip:jmax+1-skip] = np.minimum(x,
+            #                                                y)
+            for j in range(j_start, j_end):
+                # print('j =', j, 'max=',min(c, c - r + i + window))
+                if cost_matrix is None:
+                    if s1_isavailable[i] and s2_isavailable[j]:
+                        d = cost(s1[i], s2[j])
+                    else:
+                        d = COST_OF_MISSING
+                else:
+                    d = cost_matrix[i, j]
+                if max_step is not None and d > max_step:
+                    continue
+                # print(i, j + 1 - skip, j - skipp, j + 1 - skipp, j - skip)
             
-            if missing_restrict and s1_isavailable[i0] and (missing_restrict_partial or (s2_isavailable[max(0, j-1)] and s2_isavailable[j])):
-                penalty_horizontal = 0
-            else:
-                penalty_horizontal = np.inf
-            if missing_restrict and s2_isavailable[j] and (missing_restrict_partial or (s1_isavailable[max(0, i0-1)] and s1_isavailable[i0])):
-                penalty_vertical = 0
-            else:
-                penalty_vertical = np.inf
+                if missing_restrict and s1_isavailable[i0] and (missing_restrict_partial or (s2_isavailable[max(0, j-1)] and s2_isavailable[j])):
+                    penalty_horizontal = 0
+                else:
+                    penalty_horizontal = np.inf
+                if missing_restrict and s2_isavailable[j] and (missing_restrict_partial or (s1_isavailable[max(0, i0-1)] and s1_isavailable[i0])):
+                    penalty_vertical = 0
+                else:
+                    penalty_vertical = np.inf
                 
-            dtw[i1, j + 1] = d + min(dtw[i0, j],
-                                     dtw[i0, j + 1] + penalty + penalty_vertical,
-                                     dtw[i1, j] + penalty + penalty_horizontal)
-            
-            if calculate_optimal_warping_path:
-                steps[i, j] = np.argmin([dtw[i0, j],
+                dtw[i1, j + 1] = d + min(dtw[i0, j],
                                          dtw[i0, j + 1] + penalty + penalty_vertical,
-                                         dtw[i1, j] + penalty + penalty_horizontal])
+                                         dtw[i1, j] + penalty + penalty_horizontal)
             
-            if dtw[i1, j + 1] > max_dist:
-                if not smaller_found:
-                    sc = j + 1
-                if j >= ec:
-                    break
-            else:
-                smaller_found = True
-                ec_next = j + 1
-        ec = ec_next
+                if calculate_optimal_warping_path:
+                    steps[i, j] = np.argmin([dtw[i0, j],
+                                             dtw[i0, j + 1] + penalty + penalty_vertical,
+                                             dtw[i1, j] + penalty + penalty_horizontal])
+            
+                if dtw[i1, j + 1] > max_dist:
+                    if not smaller_found:
+                        sc = j + 1
+                    if j >= ec:
+                        break
+                else:
+                    smaller_found = True
+                    ec_next = j + 1
+            ec = ec_next
     
     # Decide which d to return
     dtw = result_fn(dtw)
@@ -315,6 +359,289 @@ def warping_paths(s1, s2, window=None, max_dist=None, use_pruning=False,
         return d, dtw
 
 
+def distances_to_many(query, dataset, return_optimal_warping_paths=False, batch_size=256, **kwargs):
+    """
+    Compute the DTW-AROW distances (or their variants) between one time series and every time series in a dataset.
+
+    Gives the same results as calling warping_paths(query, s, **kwargs) for every s in dataset, 
+    but the missing values of the query are determined only once, 
+    and with use_c=True, the costs of the comparisons are computed at once for batches of equal-length time series.
+    
+    :param query: Time series that is compared to every time series in dataset (e.g., a cluster mean).
+    :param dataset: Dataset. An iterable, or a 2-D or 3-D numpy array (see experiments.dtw_arow_distance_matrix).
+    :param return_optimal_warping_paths: Also return the optimal warping path between the query and every time series.
+    :param batch_size: Maximum number of time series whose costs are computed at once. DEFAULT: 256.
+    :param kwargs: Parameters to pass to warping_paths() (e.g., window, psi, missing_value_restrictions, use_c).
+    :return: Array of distances, or (array of distances, list of optimal warping paths) if return_optimal_warping_paths==True.
+    """
+    missing_fun = kwargs.pop('missing_fun', None)
+    if missing_fun is None:
+        missing_fun = MISSING_FUN_DEFAULT
+    query_ismissing = missing_fun(query)
+    
+    def missing_fun_query_once(s): # the query is passed to every call of warping_paths
+        return query_ismissing if s is query else missing_fun(s)
+    
+    precompute_costs = (kwargs.get('use_c', False) and dtw_missing_numba is not None and kwargs.get('cost_matrix') is None)
+    
+    n = len(dataset)
+    distances = np.full(n, np.nan)
+    paths = [None for _ in range(n)]
+    for batch_start in range(0, n, batch_size):
+        inds_batch = range(batch_start, min(batch_start + batch_size, n))
+        lengths = np.array([len(dataset[i]) for i in inds_batch])
+        for length in np.unique(lengths): # costs can be computed at once only for equal-length time series
+            inds = [i for i, l in zip(inds_batch, lengths) if l == length]
+            if precompute_costs:
+                s2s = np.stack([dataset[i] for i in inds])
+                s2s_isavailable = ~np.array([missing_fun(s2) for s2 in s2s]).reshape(s2s.shape[:2])
+                costs = calculate_cost_matrices(query, s2s, inner_dist=kwargs.get('inner_dist', innerdistance.default), 
+                                                s1_isavailable=~query_ismissing, s2s_isavailable=s2s_isavailable)
+            for k, i in enumerate(inds):
+                result = warping_paths(query, dataset[i], missing_fun=missing_fun_query_once, 
+                                       return_optimal_warping_path=return_optimal_warping_paths, 
+                                       precomputed_costs=costs[k] if precompute_costs else None, 
+                                       **kwargs)
+                distances[i] = result[0]
+                if return_optimal_warping_paths:
+                    paths[i] = result[2]
+    
+    if return_optimal_warping_paths:
+        return distances, paths
+    else:
+        return distances
+
+
+def lower_bound_envelope(s1, c, window=None, missing_fun=None, missing_value_restrictions="full"):
+    """
+    Calculate the envelope of a time series (the first sequence of warping_paths) for every time sample 
+    of a second time series of length c, i.e., the minimum and maximum of the time samples of s1 that 
+    can be matched with that time sample. The envelope is used by lower_bound() (LB_Keogh). 
+    
+    Missing time samples of s1 are matched at zero cost (COST_OF_MISSING), 
+    so the envelope is (-inf, inf) wherever a missing time sample can be matched.
+    
+    :param s1: First sequence.
+    :param c: Length of the second sequence.
+    :param window: see warping_paths.
+    :param missing_fun: see warping_paths.
+    :param missing_value_restrictions: see warping_paths. With restrictions (and without psi), warping_paths 
+                                       does not use the window, so neither does the envelope.
+    :return: lower envelope and upper envelope, as arrays of size c x (number of dimensions).
+    """
+    if missing_fun is None:
+        missing_fun = MISSING_FUN_DEFAULT
+    r = len(s1)
+    s1_ = np.asarray(s1, dtype=np.float64).reshape(r, -1)
+    s1_missing = np.asarray(missing_fun(s1), dtype=bool)[:, np.newaxis]
+    lower_s1 = np.where(s1_missing, -inf, s1_)
+    upper_s1 = np.where(s1_missing, inf, s1_)
+    if window is None or missing_value_restrictions in ['full', 'partial']:
+        window = max(r, c)
+    lower = np.full((c, s1_.shape[1]), inf) # empty range: the time sample cannot be matched at all
+    upper = np.full((c, s1_.shape[1]), -inf)
+    for j in range(c):
+        i_start = max(0, j - max(0, c - r) - window + 1)
+        i_end = min(r, j + max(0, r - c) + window)
+        if i_start < i_end:
+            lower[j] = lower_s1[i_start:i_end].min(axis=0)
+            upper[j] = upper_s1[i_start:i_end].max(axis=0)
+    return lower, upper
+
+
+def lower_bound(s1, s2, envelope=None, window=None, inner_dist=innerdistance.default, 
+                missing_value_restrictions="full", missing_value_adjustment="proportion_of_missing_values", 
+                missing_fun=None, **kwargs):
+    """
+    Lower bound of the DTW-AROW distance (or its variants) that remains valid when there are missing values.
+    
+    Every time sample of s2 is matched with at least one time sample of s1 within the window, and 
+    comparisons that involve missing values cost COST_OF_MISSING (zero). 
+    The lower bound combines LB_Keogh (the cost of every time sample of s2 outside the envelope of s1) 
+    with LB_Kim (the exact cost of the first and the last comparisons, which are on every warping path). 
+    The restrictions on warping and the penalty can only increase the distance, so they are ignored.
+    
+    :param s1: First sequence (as in warping_paths).
+    :param s2: Second sequence (as in warping_paths).
+    :param envelope: Envelope of s1 for the length of s2, as returned by lower_bound_envelope. 
+                     DEFAULT: None (computed).
+    :param kwargs: Other parameters of warping_paths (e.g., psi), which must be the same as for the distance.
+    :return: Lower bound of warping_paths(s1, s2, ...)[0], or 0 if no lower bound is available for these parameters 
+             (psi-relaxation, a precomputed cost matrix, or a custom inner distance).
+    """
+    if kwargs.get('psi') is not None or kwargs.get('cost_matrix') is not None or inner_dist not in ['squared euclidean', 'euclidean']:
+        return 0
+    if missing_fun is None:
+        missing_fun = MISSING_FUN_DEFAULT
+    r, c = len(s1), len(s2)
+    if envelope is None:
+        envelope = lower_bound_envelope(s1, c, window=window, missing_fun=missing_fun, 
+                                        missing_value_restrictions=missing_value_restrictions)
+    lower, upper = envelope
+    s1_ = np.asarray(s1, dtype=np.float64).reshape(r, -1)
+    s2_ = np.asarray(s2, dtype=np.float64).reshape(c, -1)
+    s1_isavailable = ~np.asarray(missing_fun(s1), dtype=bool)
+    s2_isavailable = ~np.asarray(missing_fun(s2), dtype=bool)
+    
+    gaps = np.maximum(s2_ - upper, 0) + np.maximum(lower - s2_, 0) # distance of every time sample of s2 to the envelope
+    gaps[~s2_isavailable[:, np.newaxis] | np.isnan(gaps)] = 0
+    costs = np.sum(gaps ** 2, axis=1) # LB_Keogh (for the squared euclidean distance)
+    if c >= 2: # LB_Kim: the first and the last columns of every warping path contain the first and the last comparisons
+        for i, j in [(0, 0), (r - 1, c - 1)]:
+            costs[j] = np.sum((s1_[i] - s2_[j]) ** 2) if s1_isavailable[i] and s2_isavailable[j] else COST_OF_MISSING
+    if inner_dist == 'euclidean':
+        costs = np.sqrt(costs)
+    
+    _, result_fn = innerdistance.inner_dist_fns(inner_dist, use_ndim=True)
+    lb = result_fn(np.sum(costs))
+    if missing_value_adjustment != "proportion_of_missing_comparisons": # the adjustment factor does not depend on the warping path
+        lb = lb*calculate_adjustment_factor(s1, s2, missing_value_adjustment=missing_value_adjustment, missing_fun=missing_fun)
+    # (otherwise, the adjustment factor is at least 1)
+    return lb
+
+
+def distances_to_nearest(queries, candidates, **kwargs):
+    """
+    Compute the DTW-AROW distances (or their variants) that are needed to find the nearest candidate of every query 
+    (e.g., the nearest cluster mean of every time series).
+    
+    For every query, the candidates are compared in the order of their lower bounds (see lower_bound); 
+    a candidate is skipped if its lower bound exceeds the distance to the nearest candidate so far, 
+    and otherwise the computation is abandoned early (using max_dist) once the cost exceeds that distance. 
+    The distance to the nearest candidate, and to every candidate at the same distance, is exact (as in warping_paths), 
+    whereas the other distances are inf. Hence, np.argmin and np.min give the same results as for all the distances.
+    
+    The distances are computed as warping_paths(candidate, query, **kwargs), as in distances_to_many(candidate, queries).
+    
+    :param queries: Dataset. An iterable, or a 2-D or 3-D numpy array (see experiments.dtw_arow_distance_matrix).
+    :param candidates: Candidates (e.g., cluster means). An iterable, or a 2-D or 3-D numpy array.
+    :param kwargs: Parameters to pass to warping_paths() (e.g., window, psi, missing_value_restrictions, use_c).
+    :return: Matrix of distances of size len(queries) x len(candidates), and a dictionary of counters: 
+             'pairs': the number of pairs, 
+             'pruned': the number of pairs skipped because of the lower bound, 
+             'abandoned': the number of pairs whose computation was abandoned early, 
+             'computed': the number of pairs whose distance was computed completely.
+    """
+    max_dist = kwargs.pop('max_dist', None)
+    if not max_dist:
+        max_dist = inf
+    # max_dist is compared to the accumulated cost, which is a squared distance only for the squared euclidean inner distance:
+    # (and the proportion of missing comparisons needs the whole warping path, so the computation cannot be abandoned):
+    abandon_early = kwargs.get('inner_dist', innerdistance.default) == 'squared euclidean' and kwargs.get('cost_matrix') is None \
+                    and kwargs.get('missing_value_adjustment') != 'proportion_of_missing_comparisons'
+    envelope_params = {key: kwargs[key] for key in ['window', 'missing_fun', 'missing_value_restrictions'] if key in kwargs}
+    envelopes = {} # for every length of the queries
+    
+    counters = dict(pairs=0, pruned=0, abandoned=0, computed=0)
+    distances = np.full((len(queries), len(candidates)), inf)
+    for q, query in enumerate(queries):
+        c = len(query)
+        if c not in envelopes:
+            envelopes[c] = [lower_bound_envelope(candidate, c, **envelope_params) for candidate in candidates]
+        lbs = np.array([lower_bound(candidate, query, envelope=envelope, **kwargs) 
+                        for candidate, envelope in zip(candidates, envelopes[c])])
+        best = max_dist
+        for k in np.argsort(lbs, kind='stable'):
+            counters['pairs'] += 1
+            threshold = best*(1 + PRUNING_TOLERANCE) # so that rounding errors cannot discard a candidate at the same distance
+            if lbs[k] > threshold:
+                counters['pruned'] += 1
+                continue
+            d = warping_paths(candidates[k], query, max_dist=threshold if abandon_early else max_dist, **kwargs)[0]
+            if not np.isfinite(d): # e.g. nan when no comparison is available, so that np.argmin cannot pick it
+                d = inf
+            if d == inf and threshold < inf:
+                counters['abandoned'] += 1
+            else:
+                counters['computed'] += 1
+            distances[q, k] = d
+            best = min(best, d)
+    return distances, counters
+
+
+def calculate_cost_matrix(s1, s2, inner_dist=innerdistance.default, s1_isavailable=None, s2_isavailable=None, missing_fun=None):
+    """Calculate the cost of every comparison between the time samples of two time series at once.
+
+    The costs are identical to those computed one by one in the Python implementation of warping_paths:
+    comparisons that involve missing values cost COST_OF_MISSING.
+
+    :param s1: First sequence.
+    :param s2: Second sequence.
+    :param inner_dist: Distance between two points in the time series.
+        One of 'squared euclidean' (default), 'euclidean', or a custom inner distance class.
+    :param s1_isavailable: Whether each time sample of s1 is available (not missing). DEFAULT: None (computed using missing_fun).
+    :param s2_isavailable: Whether each time sample of s2 is available (not missing). DEFAULT: None (computed using missing_fun).
+    :param missing_fun: function (applied on s1 and s2) to check whether each time instant is missing or not
+                        (DEFAULT: None: consider a time instant as missing if any dimension has a missing value np.nan)
+    :return: Cost matrix of size len(s1) x len(s2).
+    """
+    if missing_fun is None:
+        missing_fun = MISSING_FUN_DEFAULT
+    s2 = np.asarray(s2)
+    if s2_isavailable is None:
+        s2_isavailable = ~missing_fun(s2)
+    return calculate_cost_matrices(s1, s2[np.newaxis], inner_dist=inner_dist, 
+                                   s1_isavailable=s1_isavailable, s2s_isavailable=np.asarray(s2_isavailable)[np.newaxis], 
+                                   missing_fun=missing_fun)[0]
+
+
+def calculate_cost_matrices(s1, s2s, inner_dist=innerdistance.default, s1_isavailable=None, s2s_isavailable=None, missing_fun=None):
+    """Calculate the cost matrices between one time series and a batch of equal-length time series at once.
+
+    See calculate_cost_matrix.
+
+    :param s1: First sequence.
+    :param s2s: Batch of sequences of the same length, as an array whose first dimension is the batch.
+    :param inner_dist: Distance between two points in the time series.
+        One of 'squared euclidean' (default), 'euclidean', or a custom inner distance class.
+    :param s1_isavailable: Whether each time sample of s1 is available (not missing). DEFAULT: None (computed using missing_fun).
+    :param s2s_isavailable: Whether each time sample of each sequence in s2s is available (not missing), as a 2-D array. 
+                            DEFAULT: None (computed using missing_fun).
+    :param missing_fun: function (applied on s1 and every sequence in s2s) to check whether each time instant is missing or not
+                        (DEFAULT: None: consider a time instant as missing if any dimension has a missing value np.nan)
+    :return: Cost matrices of size len(s2s) x len(s1) x len(s2s[0]).
+    """
+    if missing_fun is None:
+        missing_fun = MISSING_FUN_DEFAULT
+    s1 = np.asarray(s1)
+    s2s = np.asarray(s2s)
+    if s1_isavailable is None:
+        s1_isavailable = ~missing_fun(s1)
+    if s2s_isavailable is None:
+        s2s_isavailable = np.array([~missing_fun(s2) for s2 in s2s]).reshape(s2s.shape[:2])
+    isavailable = s1_isavailable[np.newaxis, :, np.newaxis] & s2s_isavailable[:, np.newaxis, :]
+    b, r, c = isavailable.shape
+
+    cost, _ = innerdistance.inner_dist_fns(inner_dist, use_ndim=True)
+    if isinstance(inner_dist, str) and inner_dist in ('squared euclidean', 'euclidean') and dtw_missing_numba is not None:
+        diff = s1.reshape(1, r, 1, -1) - s2s.reshape(b, 1, c, -1) # the first dimension of every time series is time
+        if s1.ndim == 1 and s2s.ndim == 2:
+            # univariate: cost() is applied on numpy scalars, which numpy squares using pow() from C (instead of multiplication), 
+            # or using a ufunc in a higher precision (e.g., float32 with numpy<2). Mimic it to get identical costs:
+            diff = diff[..., 0]
+            if s1_isavailable.any() and s2s_isavailable.any():
+                k, j = np.unravel_index(np.argmax(s2s_isavailable), s2s_isavailable.shape)
+                dtype_cost = np.result_type(cost(s1[np.argmax(s1_isavailable)], s2s[k, j]))
+            else:
+                dtype_cost = diff.dtype
+            if inner_dist == 'squared euclidean' and dtype_cost == diff.dtype: # scalar arithmetic
+                cost_matrices = dtw_missing_numba.power(np.ascontiguousarray(diff), diff.dtype.type(2))
+            else: # ufunc (np.power, or scalar arithmetic in a higher precision)
+                cost_matrices = np.power(diff.astype(dtype_cost), np.full(diff.shape, 2))
+            if inner_dist == 'euclidean':
+                cost_matrices = np.sqrt(cost_matrices)
+        elif inner_dist == 'squared euclidean': # same operations as cost() on arrays
+            cost_matrices = np.sum(diff ** 2, axis=3)
+        else:
+            cost_matrices = np.sqrt(np.sum(np.power(diff, 2), axis=3))
+    else: # custom inner distance (or no Numba): no vectorized version available
+        cost_matrices = np.full((b, r, c), COST_OF_MISSING, dtype=np.float64)
+        for k, i, j in np.argwhere(isavailable):
+            cost_matrices[k, i, j] = cost(s1[i], s2s[k, j])
+
+    return np.where(isavailable, cost_matrices, COST_OF_MISSING)
+
+
 def count_missing(s, missing_fun=None): # count the rows with any missing (nan) values in an array
     if missing_fun is None:
         missing_fun = MISSING_FUN_DEFAULT
@@ -0,0 +1,176 @@
+"""
+Compiled (Numba) kernel for DTW-AROW.
+
+The kernel fills the accumulated cost matrix exactly as the Python loop in
+dtw_missing.warping_paths does (same order of operations, same tie-breaking),
+so that both implementations give identical results.
+It is used by dtw_missing.warping_paths when use_c=True.
+"""
+
+import numpy as np
+import numba
+
+
+@numba.njit(cache=True)
+def warping_paths_loop(dtw, steps, cost_matrix, step_exceeded,
+                       s1_isavailable, s2_isavailable,
+                       left_bounds, right_bounds, use_custom_bounds,
+                       window, penalty, max_dist,
+                       missing_restrict, missing_restrict_partial,
+                       calculate_optimal_warping_path):
+    """
+    Fill the accumulated cost matrix (and the matrix of steps) of DTW-AROW in place.
+
+    :param dtw: Accumulated cost matrix of size (r+1)x(c+1), initialized as in dtw_missing.warping_paths.
+    :param steps: Matrix of steps of size (r)x(c) filled with np.nan (0: diagonal, 1: vertical, 2: horizontal).
+                  Only used if calculate_optimal_warping_path is True.
+    :param cost_matrix: Cost of every comparison (float64), COST_OF_MISSING for comparisons that involve missing values.
+    :param step_exceeded: Whether the cost of every comparison exceeds max_step.
+    :param s1_isavailable: Whether each time sample of the first sequence is available (not missing).
+    :param s2_isavailable: Whether each time sample of the second sequence is available (not missing).
+    :param left_bounds: Left bounds (for every row) computed by calculate_missing_bounds_fast.
+    :param right_bounds: Right bounds (for every row) computed by calculate_missing_bounds_fast.
+    :param use_custom_bounds: Use left_bounds and right_bounds instead of the window.
+    :param window: Warping window (used if use_custom_bounds is False).
+    :param penalty: Squared penalty for horizontal and vertical steps.
+    :param max_dist: Squared maximum distance (inf if not used).
+    :param missing_restrict: Restrict warping in case of missing values.
+    :param missing_restrict_partial: Use partial (instead of full) restrictions.
+    :param calculate_optimal_warping_path: Fill the matrix of steps.
+    :return: Index of the last row of dtw that has been processed.
+    """
+    r, c = cost_matrix.shape
+    inf = np.inf
+    i1 = 0
+    sc = 0
+    ec = 0
+    for i in range(r):
+        i0 = i
+        i1 = i + 1
+        if not use_custom_bounds:
+            j_start = max(0, i - max(0, r - c) - window + 1)
+            j_end = min(c, i + max(0, c - r) + window)
+        else:
+            j_start = left_bounds[i]
+            j_end = right_bounds[i] + 1
+        if sc > j_start:
+            j_start = sc
+        smaller_found = False
+        ec_next = i
+        for j in range(j_start, j_end):
+            if step_exceeded[i, j]:
+                continue
+            d = cost_matrix[i, j]
+
+            if missing_restrict and s1_isavailable[i0] and (missing_restrict_partial or (s2_isavailable[max(0, j-1)] and s2_isavailable[j])):
+                penalty_horizontal = 0.0
+            else:
+                penalty_horizontal = inf
+            if missing_restrict and s2_isavailable[j] and (missing_restrict_partial or (s1_isavailable[max(0, i0-1)] and s1_isavailable[i0])):
+                penalty_vertical = 0.0
+            else:
+                penalty_vertical = inf
+
+            # same semantics as min() and np.argmin() on [diagonal, vertical, horizontal] (the first minimum wins):
+            best = dtw[i0, j]
+            step = 0
+            v = dtw[i0, j + 1] + penalty + penalty_vertical
+            if v < best:
+                best = v
+                step = 1
+            v = dtw[i1, j] + penalty + penalty_horizontal
+            if v < best:
+                best = v
+                step = 2
+            dtw[i1, j + 1] = d + best
+
+            if calculate_optimal_warping_path:
+                steps[i, j] = step
+
+            if dtw[i1, j + 1] > max_dist:
+                if not smaller_found:
+                    sc = j + 1
+                if j >= ec:
+                    break
+            else:
+                smaller_found = True
+                ec_next = j + 1
+        ec = ec_next
+    return i1
+
+
+@numba.njit(cache=True)
+def power(x, exponent):
+    """
+    Raise every element of x to the power exponent using pow() from C, as numpy does for scalars
+    (numpy uses multiplication for squaring arrays, which can differ in the last bit).
+
+    :param x: Array of floats.
+    :param exponent: Exponent, a float of the same type as the elements of x.
+    :return: Array of the same shape and type as x.
+    """
+    out = np.empty_like(x)
+    x_flat = x.ravel()
+    out_flat = out.ravel()
+    for i in range(x_flat.size):
+        out_flat[i] = x_flat[i] ** exponent
+    return out
+
+
+@numba.njit(cache=True)
+def missing_bounds(s1_missing, s2_missing, missing_restrict_partial):
+    """
+    Calculate the left and right bounds (for every row) of DTW-AROW, 
+    exactly as dtw_missing.calculate_missing_bounds_fast does.
+
+    :param s1_missing: Whether each time sample of the first sequence is missing.
+    :param s2_missing: Whether each time sample of the second sequence is missing.
+    :param missing_restrict_partial: Use partial (instead of full) restrictions.
+    :return: left bounds, right bounds, whether constrained warping path is possible or not
+    """
+    r = len(s1_missing)
+    c = len(s2_missing)
+
+    leb1 = np.full(r, c-1, dtype=np.int64) # left bound 1 for the path starting from the top left
+    j = 0
+    leb1_impossible = False
+    for i in range(0, r):
+        leb1[i] = j
+        if (not missing_restrict_partial and (s1_missing[i] or s1_missing[min(i+1, r-1)])) or s2_missing[j]:
+            j += 1
+        if j > c-1:
+            if i < r-1:
+                leb1_impossible = True
+            break
+
+    leb2 = np.zeros(r, dtype=np.int64) # left bound 2 for the path starting from the bottom right
+    i = r-1
+    leb2_impossible = False
+    for j in range(c-1, -1, -1):
+        leb2[i] = j
+        if s1_missing[i] or (not missing_restrict_partial and (s2_missing[max(j-1, 0)] or s2_missing[j])):
+            i -= 1
+        if i < 0:
+            if j > 0:
+                leb2_impossible = True
+            break
+
+    rib1 = np.full(r, c-1, dtype=np.int64) # right bound 1 for the path starting from top left
+    i = 0
+    for j in range(0, c):
+        rib1[i] = j
+        if s1_missing[i] or (not missing_restrict_partial and (s2_missing[j] or s2_missing[min(j+1, c-1)])):
+            i += 1
+        if i > r-1:
+            break
+
+    rib2 = np.zeros(r, dtype=np.int64) # right bound 2 for the path starting from bottom right
+    j = c-1
+    for i in range(r-1, -1, -1):
+        rib2[i] = j
+        if (not missing_restrict_partial and (s1_missing[i] or s1_missing[max(i-1, 0)])) or s2_missing[j]:
+            j -= 1
+        if j < 0:
+            break
+
+    return np.maximum(leb1, leb2), np.minimum(rib1, rib2), not (leb1_impossible or leb2_impossible)
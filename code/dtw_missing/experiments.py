@@ -7,10 +7,11 @@ import dtw_missing.missing_utils as mus
 from dtw_missing import dtw_barycenter_imputation
 
 from tools.parallel_cdist import cdist_generic
+from tools.distance_store import DistanceStore
 from dtaidistance import dtw_barycenter
 from sklearn_extra.cluster import KMedoids
 from scipy.stats import mode
-from joblib import Parallel, delayed
+from joblib import Parallel, delayed, effective_n_jobs
 from tqdm import tqdm
 
 logger = logging.getLogger("be.kuleuven.dtw_missing")
@@ -28,7 +29,7 @@ def dtw_arow_distance(s1, s2, dtw_params={}):
     return dtw_m.warping_paths(s1, s2, **dtw_params)[0]
 
 
-def dtw_arow_distance_matrix(dataset, dtw_params={}, n_jobs=-1, progress_bar=False):
+def dtw_arow_distance_matrix(dataset, dtw_params={}, n_jobs=-1, progress_bar=False, cache_dir=None):
     """
     Compute pairwise DTW-AROW (or other variants of DTW-AROW) distances in a dataset.
     
@@ -42,21 +43,64 @@ def dtw_arow_distance_matrix(dataset, dtw_params={}, n_jobs=-1, progress_bar=Fal
     :param dtw_params: Parameters to pass to dtw_missing.warping_paths(). DEFAULT: {}.
     :param n_jobs: The number of parallel jobs. DEFAULT: -1 (use all available resources).
     :param progress_bar: Whether to show a progress bar or not. DEFAULT: False.
+    :param cache_dir: Directory of the on-disk distance store (see tools.distance_store.DistanceStore). 
+                      If given, the matrix is read from the store if it has been computed for the same dataset and dtw_params before, 
+                      and an interrupted computation is resumed. DEFAULT: None (compute the matrix in memory).
     :return: Pairwise distance matrix.
     """
     
+    if cache_dir is not None:
+        store = DistanceStore(cache_dir, dataset, dtw_params, n_jobs=n_jobs)
+        store.compute(dtw_arow_distance, n_jobs=n_jobs, progress_bar=progress_bar, parallel_method='processes', dtw_params=dtw_params)
+        return store.squareform()
+    
     return cdist_generic(
-                         #dist_fun=dtw_arow_distance, 
-                         dist_fun=lambda s1, s2: dtw_arow_distance(s1, s2, dtw_params),
+                         dist_fun=dtw_arow_distance, # a module-level function (not a lambda) so that it can be pickled to the worker processes
                          dataset1=dataset, 
                          n_jobs=n_jobs, 
                          progress_bar=progress_bar, 
                          compute_diagonal=False, 
                          parallel_method='processes',
-                         #**dtw_params
+                         dtw_params=dtw_params,
                         )
 
 
+def dtw_arow_distances_to_centroids(dataset, centroids, dtw_params={}, n_jobs=-1, progress_bar=False, lb_pruning=False):
+    """
+    Compute DTW-AROW (or other variants of DTW-AROW) distances between every time series in a dataset and every centroid.
+    
+    Every centroid is compared to (a chunk of) the dataset at once using dtw_missing.distances_to_many, 
+    so that the work on the centroid is not repeated for every time series.
+    
+    :param dataset: Dataset. An iterable, or a 2-D or 3-D numpy array (see dtw_arow_distance_matrix).
+    :param centroids: Centroids (e.g., cluster means). An iterable, or a 2-D or 3-D numpy array.
+    :param dtw_params: Parameters to pass to dtw_missing.warping_paths(). DEFAULT: {}.
+    :param n_jobs: The number of parallel jobs. DEFAULT: -1 (use all available resources).
+    :param progress_bar: Whether to show a progress bar or not. DEFAULT: False.
+    :param lb_pruning: Only compute the distances that are needed to find the nearest centroid of every time series, 
+                       using lower bounds and early abandoning (see dtw_missing.distances_to_nearest). 
+                       The other distances are inf, so the minimum and the argmin of every row are not affected. 
+                       DEFAULT: False.
+    :return: Distance matrix of size len(dataset) x len(centroids), 
+             and if lb_pruning is True, the counters of dtw_missing.distances_to_nearest (summed over the chunks).
+    """
+    n_chunks = effective_n_jobs(n_jobs)
+    chunks = np.array_split(np.arange(len(dataset)), n_chunks)
+    
+    if lb_pruning:
+        results = Parallel(n_jobs=n_jobs)(delayed(dtw_m.distances_to_nearest)([dataset[i] for i in chunk], centroids, **dtw_params)
+                                          for chunk in tqdm(chunks, desc='calculating distances', disable=not progress_bar)
+                                         )
+        counters = {key: sum(counters_chunk[key] for _, counters_chunk in results) for key in results[0][1]}
+        return np.vstack([distances_chunk for distances_chunk, _ in results]), counters
+    
+    distances = Parallel(n_jobs=n_jobs)(delayed(dtw_m.distances_to_many)(centroid, [dataset[i] for i in chunk], **dtw_params)
+                                        for centroid in tqdm(centroids, desc='calculating distances', disable=not progress_bar)
+                                        for chunk in chunks
+                                       )
+    return np.column_stack([np.concatenate(distances[c*n_chunks:(c+1)*n_chunks]) for c in range(len(centroids))])
+
+
 DEFAULT_DTW_CAI_PARAMS = dict(iterative_imputation=False, 
                               no_clusters='elbow',
                               maxiter_kmeans=100,
@@ -65,6 +109,7 @@ DEFAULT_DTW_CAI_PARAMS = dict(iterative_imputation=False,
                               dba_init='medoid',
                               random_state=None,
                               dba_thr=0,
+                              lb_pruning=False,
                              )
 
 
@@ -104,7 +149,7 @@ class Experiment:
         pass
     
     
-    def compute_pairwise_distances(self, missing_method, missing_method_params={}, n_jobs=-1, progress_bar=False):
+    def compute_pairwise_distances(self, missing_method, missing_method_params={}, n_jobs=-1, progress_bar=False, cache_dir=None):
         """
         Compute pairwise DTW-AROW or DTW-CAI distances (or their variants).
 
@@ -133,14 +178,19 @@ class Experiment:
                                               random_state: Random seed for DBA initialization (used when dba_init is None).
                                               dba_thr: Threshold on the change in the barycenter average (as the mean absolute difference) 
                                                        used as a stopping criterion for DBA.
+                                              lb_pruning: Whether to skip (using lower bounds) or abandon early the distances to the cluster means 
+                                                          that cannot be the smallest when assigning the instances to clusters. 
+                                                          Gives the same clusters. DEFAULT: False.
         :param n_jobs: The number of parallel jobs. DEFAULT: -1 (use all available resources).
         :param progress_bar: Whether to show a progress bar or not. DEFAULT: False.
+        :param cache_dir: Directory of the on-disk store for the DTW-AROW distance matrices (see dtw_arow_distance_matrix). 
+                          DEFAULT: None (do not cache).
         :return: Pairwise distance matrix D.
         """        
         if missing_method == 'dtw_arow':
-            self.D = dtw_arow_distance_matrix(self._dataset, missing_method_params, n_jobs, progress_bar)
+            self.D = dtw_arow_distance_matrix(self._dataset, missing_method_params, n_jobs, progress_bar, cache_dir)
         elif missing_method == 'dtw_cai':
-            self.__dtw_cai(missing_method_params, n_jobs, progress_bar)
+            self.__dtw_cai(missing_method_params, n_jobs, progress_bar, cache_dir)
         
         return self.D
     
@@ -149,7 +199,7 @@ class Experiment:
         return self.D
     
     
-    def __dtw_cai(self, missing_method_params, n_jobs, progress_bar):
+    def __dtw_cai(self, missing_method_params, n_jobs, progress_bar, cache_dir=None):
         # Execute the DTW-CAI algorithm (or its variants).
         
         show_elbow = False
@@ -188,7 +238,7 @@ class Experiment:
                                                                 )
         elif maxiter_dba == 0: # use the medoid (with linear interpolation for missing values) instead of DBA
             def dba_func(X_, dba_averages_initial):
-                D_ = dtw_arow_distance_matrix(self.dataset, dtw_params, n_jobs=n_jobs, progress_bar=progress_bar)
+                D_ = dtw_arow_distance_matrix(self.dataset, dtw_params, n_jobs=n_jobs, progress_bar=progress_bar, cache_dir=cache_dir)
                 mn = X_[np.argmin(D_.mean(axis=0))] # medoid
                 mn_imputed = mus.interpolate_missing(mn) # interpolate because of possible missing values
                 return mn_imputed
@@ -199,7 +249,7 @@ class Experiment:
                 return mus.interpolate_missing(mn) # interpolate because of possible missing values
         
         print('Computing DTW-AROW distances...')
-        self.D_dtw_arow = dtw_arow_distance_matrix(self._dataset, dtw_params, n_jobs, progress_bar)
+        self.D_dtw_arow = dtw_arow_distance_matrix(self._dataset, dtw_params, n_jobs, progress_bar, cache_dir) # reused by KMedoids and the elbow method
         
         print('Executing the clustering in DTW-CAI...')
         select_columns = lambda O, o: O[np.arange(len(O)), o] # for each row r of O, select o[i]th column
@@ -266,6 +316,7 @@ class Experiment:
         Xs_imp = [] # imputed X in each iteration
         distances_to_means = [] # distances of instances to cluster means in each iteration
         inertias = [] # cluster inertias for each iteration
+        lb_pruning_counters = [] # counters of the lower-bound pruning for each iteration (if dtw_cai_params['lb_pruning'])
         i = 0
         X_ = copy.deepcopy(self.dataset)
         while True:
@@ -273,15 +324,18 @@ class Experiment:
             # Assign labels:
             # labels.append([np.apply_along_axis(lambda o: distance_func(o, X_missing[ii]), 1, means[-1]).argmin() for ii in range(n)]) # slow, non-parallel
             # labels.append([np.apply_along_axis(lambda o: Experiment_DTW_AROW.calculate_distance(o, X_[ii] if iterative_imputation else self.dataset[ii], **self.dtw_params), 1, dba_averages_all_iterations[-1]).argmin() for ii in range(n)]) # slow, non-parallel
-            distances_to_means.append(cdist_generic(lambda o, oo: dtw_arow_distance(o, oo, dtw_params), #distance_func, 
-                                                    dataset1 = X_ if iterative_imputation else self.dataset, 
-                                                    dataset2 = dba_averages_all_iterations[-1], 
-                                                    n_jobs=n_jobs, 
-                                                    progress_bar=progress_bar,
-                                                    # compute_diagonal=False, 
-                                                    # parallel_method='processes'
-                                                   )
-                                     )
+            distances_to_means_ = dtw_arow_distances_to_centroids(X_ if iterative_imputation else self.dataset, 
+                                                                  dba_averages_all_iterations[-1], 
+                                                                  dtw_params, 
+                                                                  n_jobs=n_jobs, 
+                                                                  progress_bar=progress_bar,
+                                                                  lb_pruning=dtw_cai_params['lb_pruning'], 
+                                                                 )
+            if dtw_cai_params['lb_pruning']: # only the distances to the nearest means are computed (the others are inf)
+                distances_to_means_, counters = distances_to_means_
+                lb_pruning_counters.append(counters)
+                print(f"{counters['pruned'] + counters['abandoned']} of {counters['pairs']} full DTW-AROW computations avoided")
+            distances_to_means.append(distances_to_means_)
             
             labels.append(np.argmin(distances_to_means[-1], axis=1))
             
@@ -393,6 +447,8 @@ class Experiment:
             # else:
             #     clustering_results['ARI_clustering_all_iterations'] = None
             clustering_results['inertia_all_iterations'] = np.array(inertias)
+            if dtw_cai_params['lb_pruning']:
+                clustering_results['lb_pruning_counters_all_iterations'] = lb_pruning_counters
         self.experiment_results_additional['clustering_results'] = clustering_results
         
         self.experiment_results_additional['dataset_imputed'] = self.dataset_imputed # added later, some saved results may not have this
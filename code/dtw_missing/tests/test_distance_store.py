@@ -0,0 +1,62 @@
+# Test the on-disk store for pairwise distance matrices
+
+import numpy as np
+
+from dtw_missing.tools.distance_store import DistanceStore
+from dtw_missing.tools.parallel_cdist import cdist_generic
+
+
+def absolute_difference_of_sums(s1, s2):
+    return abs(np.sum(s1) - np.sum(s2))
+
+
+def test_distance_store_resume(tmp_path):
+    # Test that an interrupted computation is resumed and that the stored matrix is reused:
+    rng = np.random.RandomState(0)
+    X = rng.randn(10, 4)
+    D_exp = cdist_generic(absolute_difference_of_sums, X, n_jobs=1, compute_diagonal=False)
+    
+    store = DistanceStore(tmp_path, X, {'a': 1}, tile_size=3)
+    store.compute(absolute_difference_of_sums, n_jobs=1, batch_size=2)
+    assert np.allclose(store.squareform(), D_exp)
+    
+    # simulate an interruption after the first tiles:
+    store.finished[2:] = False
+    store.distances[:] = np.nan
+    store.finished.flush()
+    store.distances.flush()
+    
+    store = DistanceStore(tmp_path, X, {'a': 1}, tile_size=5) # the tile size of the existing store is used
+    assert store.tile_size == 3 and not store.is_complete()
+    store.compute(absolute_difference_of_sums, n_jobs=1)
+    D = store.squareform()
+    assert np.isnan(D).sum() > 0 # the first tiles were not recomputed
+    
+    # different parameters: a different store
+    store = DistanceStore(tmp_path, X, {'a': 2}, tile_size=4)
+    store.compute(absolute_difference_of_sums, n_jobs=2)
+    assert np.allclose(store.squareform(), D_exp)
+
+
+def scaled_difference_of_sums(s1, s2, scale):
+    return scale * abs(np.sum(s1) - np.sum(s2))
+
+
+def test_distance_store_positional_args(tmp_path):
+    # Test that extra positional arguments are passed to the distance function:
+    rng = np.random.RandomState(0)
+    X = rng.randn(9, 4)
+    D_exp = np.array([[scaled_difference_of_sums(x, y, 3) for y in X] for x in X])
+    np.fill_diagonal(D_exp, 0)
+    store = DistanceStore(tmp_path, X, {'scale': 3}, tile_size=2)
+    store.compute(scaled_difference_of_sums, 1, 0, False, 'threads', 3, batch_size=2)
+    assert store.is_complete()
+    assert np.allclose(store.squareform(), D_exp)
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp_path:
+        test_distance_store_resume(tmp_path)
+    with tempfile.TemporaryDirectory() as tmp_path:
+        test_distance_store_positional_args(tmp_path)
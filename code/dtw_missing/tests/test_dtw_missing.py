@@ -170,6 +170,87 @@ def test_dtw_arow_multivariate(D=2):
     assert d == pytest.approx(d_exp)
 
 
+@pytest.mark.skipif(dtw_m.dtw_missing_numba is None, reason="Numba is not available")
+def test_compiled_dtw_arow_identical_to_python():
+    # Test that the compiled implementation of DTW-AROW (use_c=True) gives exactly the same results as the Python implementation:
+    rng = np.random.RandomState(0)
+    x, y = get_default_univariate_time_series()
+    x[np.r_[3:5, 11]] = np.nan
+    y[6:8] = np.nan
+    xs_ys = [(x, y), 
+             (x.astype(np.float32), y.astype(np.float32)), 
+             convert_univariate_into_multivariate(x, y, 3), 
+             (rng.randn(30), rng.randn(25))]
+    params_all = [{}, 
+                  {'missing_value_restrictions': 'partial'}, 
+                  {'missing_value_restrictions': 'none', 'missing_value_adjustment': None}, 
+                  {'missing_value_adjustment': 'proportion_of_missing_comparisons'}, 
+                  {'window': 3, 'penalty': 0.1}, 
+                  {'psi': 2}, 
+                  {'max_dist': 1.5, 'max_step': 1}, 
+                  {'inner_dist': 'euclidean'}]
+    for x_, y_ in xs_ys:
+        for params in params_all:
+            d_py, paths_py, path_py = dtw_m.warping_paths(x_, y_, use_c=False, return_optimal_warping_path=True, **params)
+            d_c, paths_c, path_c = dtw_m.warping_paths(x_, y_, use_c=True, return_optimal_warping_path=True, **params)
+            assert d_c == d_py or (np.isnan(d_c) and np.isnan(d_py))
+            assert np.array_equal(paths_c, paths_py, equal_nan=True)
+            assert path_c == path_py
+
+
+def test_distances_to_many():
+    # Test that comparing one time series to many gives the same results as comparing them one by one:
+    rng = np.random.RandomState(0)
+    query, _ = get_default_univariate_time_series()
+    query[3:5] = np.nan
+    dataset = [rng.randn(len(query)) for _ in range(6)] + [rng.randn(12), rng.randn(9)]
+    dataset[1][2:6] = np.nan
+    for use_c in [False, True]:
+        for params in [{}, {'missing_value_restrictions': 'partial', 'window': 4}]:
+            d, paths = dtw_m.distances_to_many(query, dataset, return_optimal_warping_paths=True, batch_size=4, use_c=use_c, **params)
+            for x, d_x, path_x in zip(dataset, d, paths):
+                d_exp, _, path_exp = dtw_m.warping_paths(query, x, return_optimal_warping_path=True, **params)
+                assert d_x == d_exp
+                assert path_x == path_exp
+
+
+def test_distances_to_nearest():
+    # Test that pruning with lower bounds and early abandoning do not change the nearest candidates and their distances:
+    rng = np.random.RandomState(0)
+    queries = rng.randn(20, 15).cumsum(axis=1)
+    queries[rng.rand(*queries.shape) < 0.1] = np.nan
+    candidates = rng.randn(5, 15).cumsum(axis=1)
+    candidates[1, 4:7] = np.nan
+    candidates[3] = candidates[2] # tie
+    for params in [{}, {'missing_value_restrictions': 'partial'}, {'missing_value_restrictions': None, 'window': 3}, 
+                   {'inner_dist': 'euclidean'}]:
+        d_all = np.array([dtw_m.distances_to_many(candidate, queries, **params) for candidate in candidates]).T
+        d, counters = dtw_m.distances_to_nearest(queries, candidates, **params)
+        assert np.array_equal(np.argmin(d, axis=1), np.argmin(d_all, axis=1))
+        assert np.array_equal(np.min(d, axis=1), np.min(d_all, axis=1))
+        assert np.all((d == d_all) | (d == np.inf))
+        assert counters['pairs'] == d.size == counters['pruned'] + counters['abandoned'] + counters['computed']
+        assert counters['pruned'] + counters['abandoned'] > 0
+        for q, k in np.ndindex(*d.shape): # the lower bound is valid
+            assert dtw_m.lower_bound(candidates[k], queries[q], **params) <= d_all[q, k]
+
+
+def test_distances_to_nearest_proportion_of_missing_comparisons():
+    # Test the nearest candidates with the adjustment that depends on the warping path (which cannot be abandoned early):
+    rng = np.random.RandomState(1)
+    queries = rng.randn(30, 15).cumsum(axis=1)
+    queries[rng.rand(*queries.shape) < 0.2] = np.nan
+    candidates = rng.randn(6, 15).cumsum(axis=1)
+    candidates[rng.rand(*candidates.shape) < 0.1] = np.nan
+    params = {'missing_value_adjustment': 'proportion_of_missing_comparisons'}
+    d_all = np.array([dtw_m.distances_to_many(candidate, queries, **params) for candidate in candidates]).T
+    d, counters = dtw_m.distances_to_nearest(queries, candidates, **params)
+    assert not np.any(np.isnan(d))
+    assert np.array_equal(np.argmin(d, axis=1), np.argmin(d_all, axis=1))
+    assert np.array_equal(np.min(d, axis=1), np.min(d_all, axis=1))
+    assert counters['abandoned'] == 0
+
+
 if __name__ == "__main__":
     logger.setLevel(logging.DEBUG)
     test_dtw()
@@ -179,4 +260,8 @@ if __name__ == "__main__":
     test_impossible_warping_in_dtw_arow_and_dtw_with_partialrestrictions()
     test_dtw_arow_multivariate(2)
     test_dtw_arow_multivariate(3)
-    test_dtw_arow_multivariate(10)
\ No newline at end of file
+    test_dtw_arow_multivariate(10)
+    test_compiled_dtw_arow_identical_to_python()
+    test_distances_to_many()
+    test_distances_to_nearest()
+    test_distances_to_nearest_proportion_of_missing_comparisons()
@@ -0,0 +1,52 @@
+# Test the tiled computation of distance matrices
+
+import numpy as np
+
+from dtw_missing.tools.parallel_cdist import cdist_generic
+
+
+def absolute_difference_of_sums(s1, s2, scale=1):
+    return scale * abs(np.sum(s1) - np.sum(s2))
+
+
+def test_cdist_generic_tiles():
+    # Test that the distance matrix does not depend on the size of the tiles:
+    rng = np.random.RandomState(0)
+    X = rng.randn(11, 4)
+    Y = rng.randn(5, 4)
+    D_exp = np.abs(X.sum(axis=1)[:, np.newaxis] - X.sum(axis=1)[np.newaxis, :])
+    C_exp = 2 * np.abs(X.sum(axis=1)[:, np.newaxis] - Y.sum(axis=1)[np.newaxis, :])
+    for tile_size in [None, 1, 3, 20]:
+        for dataset in [X, list(X)]:
+            D = cdist_generic(absolute_difference_of_sums, dataset, n_jobs=1, compute_diagonal=False, tile_size=tile_size)
+            assert np.allclose(D, D_exp)
+            C = cdist_generic(absolute_difference_of_sums, dataset, Y, n_jobs=1, tile_size=tile_size, scale=2)
+            assert np.allclose(C, C_exp)
+
+
+def test_cdist_generic_processes():
+    # Test that keyword arguments of a module-level distance function are passed to worker processes:
+    rng = np.random.RandomState(0)
+    X = rng.randn(6, 3)
+    D = cdist_generic(absolute_difference_of_sums, X, n_jobs=2, parallel_method='processes', tile_size=2, scale=3)
+    assert np.allclose(D, 3 * np.abs(X.sum(axis=1)[:, np.newaxis] - X.sum(axis=1)[np.newaxis, :]))
+
+
+def test_cdist_generic_positional_args():
+    # Test that extra positional arguments are passed to the distance function (and not bound to the tiling parameters):
+    rng = np.random.RandomState(0)
+    X = rng.randn(7, 3)
+    Y = rng.randn(4, 3)
+    D_exp = np.array([[absolute_difference_of_sums(x, y, 2) for y in X] for x in X])
+    C_exp = np.array([[absolute_difference_of_sums(x, y, 2) for y in Y] for x in X])
+    for parallel_method, n_jobs in [('threads', 1), ('processes', 2)]:
+        D = cdist_generic(absolute_difference_of_sums, X, None, n_jobs, 0, True, False, parallel_method, 2, tile_size=3)
+        assert np.allclose(D, D_exp)
+        C = cdist_generic(absolute_difference_of_sums, X, Y, n_jobs, 0, True, False, parallel_method, 2, tile_size=2)
+        assert np.allclose(C, C_exp)
+
+
+if __name__ == "__main__":
+    test_cdist_generic_tiles()
+    test_cdist_generic_processes()
+    test_cdist_generic_positional_args()
@@ -0,0 +1,151 @@
+# On-disk store for pairwise distance matrices.
+#
+# The upper triangle of the (symmetric, zero diagonal) distance matrix is stored in condensed form
+# (as scipy.spatial.distance.squareform) in a memory-mapped .npy file, so that the matrix does not
+# have to be kept in RAM while it is computed. The matrix is computed in tiles (see parallel_cdist) and
+# the finished tiles are recorded in a second memory-mapped file, so that an interrupted computation
+# resumes from the last finished tiles. The files are keyed by a hash of the dataset and of the
+# parameters of the distance, so that the matrix is reused across runs.
+
+
+import os
+import json
+
+import numpy
+import joblib
+from joblib.parallel import effective_n_jobs
+from scipy.spatial.distance import squareform
+from tqdm import tqdm
+
+from .parallel_cdist import compute_tiles, default_tile_size, upper_triangle_tiles
+
+
+STORE_VERSION = 1 # increase when the format of the files changes, so that old files are not reused
+
+
+def condensed_index(n, i, j):
+    """Index of the element (i, j) (with i < j) of an n x n matrix in its condensed form."""
+    return n * i - i * (i + 1) // 2 + (j - i - 1)
+
+
+class DistanceStore:
+    """Memory-mapped, resumable store for the pairwise distance matrix of a dataset.
+
+    Parameters
+    ----------
+    directory : str
+        Directory for the files of the store (created if it does not exist).
+    dataset : array-like
+        Dataset. A numpy array or a list of time series (as accepted by `cdist_generic`).
+    params : dict (default: {})
+        Parameters of the distance function (e.g., dtw_params). Together with
+        the dataset, they determine the key of the store.
+    tile_size : int or None (default: None)
+        Number of rows and columns of a tile (see `cdist_generic`). Ignored if
+        the store already exists, in which case the tiles of the existing store are used.
+    n_jobs : int or None (default: None)
+        Used to choose the default tile size.
+
+    Examples
+    --------
+    >>> store = DistanceStore('cache', dataset, dtw_params)
+    >>> store.compute(dtw_arow_distance, dtw_params=dtw_params)
+    >>> D = store.squareform()
+    """
+    def __init__(self, directory, dataset, params={}, tile_size=None, n_jobs=None):
+        self.dataset = dataset
+        self.n = len(dataset)
+        self.key = joblib.hash((STORE_VERSION, dataset, params))
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.key)
+        self.distances_path = path + '_distances.npy'
+        self.tiles_path = path + '_tiles.npy'
+        self.metadata_path = path + '.json'
+
+        if os.path.exists(self.metadata_path):
+            with open(self.metadata_path) as f:
+                metadata = json.load(f)
+            assert metadata['n'] == self.n, 'the store does not match the dataset'
+            self.tile_size = metadata['tile_size']
+            self.distances = numpy.load(self.distances_path, mmap_mode='r+')
+            self.finished = numpy.load(self.tiles_path, mmap_mode='r+')
+        else:
+            self.tile_size = default_tile_size(self.n, n_jobs) if tile_size is None else tile_size
+            self.distances = numpy.lib.format.open_memmap(self.distances_path, mode='w+', dtype=numpy.float64,
+                                                          shape=(self.n * (self.n - 1) // 2,))
+            self.distances[:] = numpy.nan
+            self.distances.flush()
+            self.finished = numpy.lib.format.open_memmap(self.tiles_path, mode='w+', dtype=bool,
+                                                         shape=(len(self.tiles),))
+            self.finished.flush()
+            # written last, so that the store is only reopened if it has been created completely:
+            with open(self.metadata_path, 'w') as f:
+                json.dump({'n': self.n, 'tile_size': self.tile_size, 'params': repr(params)}, f)
+
+
+    @property
+    def tiles(self):
+        """Top left corners (row, column) of the tiles that cover the upper triangle (without the diagonal)."""
+        return upper_triangle_tiles(self.n, self.tile_size, k=1)
+
+
+    def is_complete(self):
+        return bool(numpy.all(self.finished))
+
+
+    def compute(self, dist_fun, n_jobs=None, verbose=0, progress_bar=False, parallel_method='processes',
+                *args, batch_size=None, **kwargs):
+        """Compute the tiles that are not finished yet.
+
+        The tiles are computed in batches (one joblib call per batch); after
+        every batch, the distances are written to disk before the tiles are
+        marked as finished, so that an interruption loses at most one batch.
+
+        Parameters
+        ----------
+        dist_fun : function
+            Distance function, called as in `cdist_generic`.
+        n_jobs, verbose, parallel_method, *args, **kwargs
+            As in `cdist_generic`.
+        progress_bar : bool (default: False)
+            Whether to show a progress bar (over the tiles) or not.
+        batch_size : int or None, keyword-only (default: None)
+            Number of tiles per batch. If None, 4 tiles per job.
+        """
+        tiles = self.tiles
+        todo = numpy.flatnonzero(~numpy.asarray(self.finished))
+        if batch_size is None:
+            batch_size = 4 * effective_n_jobs(n_jobs)
+        with tqdm(total=len(tiles), initial=len(tiles) - len(todo), disable=not progress_bar,
+                  desc='calculating distances (tiles)') as pbar:
+            for start in range(0, len(todo), batch_size):
+                batch = todo[start:start + batch_size]
+                results = compute_tiles(dist_fun, self.dataset, None, [tiles[t] for t in batch], self.tile_size, *args, 
+                                        k=1, n_jobs=n_jobs, verbose=verbose, parallel_method=parallel_method,
+                                        **kwargs)
+                for t, tile in zip(batch, results):
+                    self._write_tile(tiles[t], tile)
+                self.distances.flush()
+                self.finished[batch] = True
+                self.finished.flush()
+                pbar.update(len(batch))
+        return self
+
+
+    def _write_tile(self, corner, tile):
+        # copy the part of the tile that lies above the diagonal; every row of it is contiguous in the condensed form
+        i0, j0 = corner
+        for r in range(tile.shape[0]):
+            i = i0 + r
+            j_start = max(j0, i + 1)
+            j_stop = j0 + tile.shape[1]
+            if j_start >= j_stop:
+                continue
+            start = condensed_index(self.n, i, j_start)
+            self.distances[start:start + j_stop - j_start] = tile[r, j_start - j0:]
+
+
+    def squareform(self):
+        """Return the full (square) distance matrix, as expected by KMedoids(metric='precomputed')."""
+        assert self.is_complete(), 'the distance matrix has not been computed completely, call compute() first'
+        return squareform(numpy.asarray(self.distances), checks=False)
@@ -1,16 +1,39 @@
 # taken from the gist https://gist.github.com/rtavenar/a4fb580ae235cc61ce8cf07878810567 of Romain Tavenard on 07.09.2021
 # 
 # modified: a progress bar and joblib parallel processing method selection added
+# modified: the matrix is computed in tiles (one joblib task per tile instead of per pair)
 
 
 import numpy
-from joblib.parallel import Parallel, delayed
+from joblib.parallel import Parallel, delayed, effective_n_jobs
 from tqdm import tqdm
 
+
+def _dataset_for_tile(dataset, start, stop):
+    # numpy arrays are sent as a whole, so that joblib memory-maps them once for all workers (instead of pickling them for every tile);
+    # other datasets (e.g., lists of variable-length time series) are sliced to the part that the tile needs
+    if isinstance(dataset, numpy.ndarray):
+        return dataset, start
+    return dataset[start:stop], 0
+
+
+def _cdist_tile(dist_fun, data1, offset1, data2, offset2, shape, diagonal_offset, k, args, kwargs):
+    # compute one tile of the distance matrix: rows offset1:offset1+shape[0] of data1 and columns offset2:offset2+shape[1] of data2.
+    # If k is not None, only the elements on and above the k-th diagonal of the whole matrix are computed 
+    # (diagonal_offset: index of the diagonal of the whole matrix on which the top left element of the tile lies).
+    tile = numpy.zeros(shape)
+    for i in range(shape[0]):
+        for j in range(shape[1]):
+            if k is not None and diagonal_offset + j - i < k:
+                continue
+            tile[i, j] = dist_fun(data1[offset1 + i], data2[offset2 + j], *args, **kwargs)
+    return tile
+
+
 def cdist_generic(dist_fun, dataset1, dataset2=None, n_jobs=None, verbose=0,
                   compute_diagonal=True, 
                   progress_bar=False, parallel_method='processes',
-                  *args, **kwargs):
+                  *args, tile_size=None, **kwargs):
     """Compute cross-similarity matrix with joblib parallelization for a given
     similarity function.
 
@@ -50,6 +73,15 @@ def cdist_generic(dist_fun, dataset1, dataset2=None, n_jobs=None, verbose=0,
     
     parallel_method : str (default: 'processes')
         'processes', 'threads', ... (see joblib.Parallel)
+        With 'processes', `dist_fun`, `args` and `kwargs` must be picklable
+        (e.g., a module-level function rather than a lambda).
+    
+    tile_size : int or None, keyword-only (default: None)
+        The matrix is computed in square tiles of `tile_size` x `tile_size`
+        elements, each tile being one parallel task (only the tiles that
+        intersect the upper triangle in the self-similarity case). 
+        Numpy array datasets are memory-mapped once for all workers by joblib.
+        ``None`` means about 4 tiles per job along each dimension.
 
     *args and **kwargs :
         Optional additional parameters to be passed to the similarity function.
@@ -59,33 +91,72 @@ def cdist_generic(dist_fun, dataset1, dataset2=None, n_jobs=None, verbose=0,
     cdist : numpy.ndarray
         Cross-similarity matrix
     """ # noqa: E501
+    n1 = len(dataset1)
+    n2 = n1 if dataset2 is None else len(dataset2)
+    if tile_size is None:
+        tile_size = default_tile_size(max(n1, n2), n_jobs)
+    
     if dataset2 is None:
         # Inspired from code by @GillesVandewiele:
         # https://github.com/rtavenar/tslearn/pull/128#discussion_r314978479
-        matrix = numpy.zeros((len(dataset1), len(dataset1)))
-        indices = numpy.triu_indices(len(dataset1),
-                                     k=0 if compute_diagonal else 1,
-                                     m=len(dataset1))
-        matrix[indices] = Parallel(n_jobs=n_jobs,
-                                   prefer=parallel_method,
-                                   verbose=verbose)(
-            delayed(dist_fun)(
-                dataset1[i], dataset1[j],
-                *args, **kwargs
-            )
-            for i in tqdm(range(len(dataset1)), disable=not progress_bar)
-            for j in range(i if compute_diagonal else i + 1,
-                           len(dataset1))
-        )
-        indices = numpy.tril_indices(len(dataset1), k=-1, m=len(dataset1))
-        matrix[indices] = matrix.T[indices]
-        return matrix
+        k = 0 if compute_diagonal else 1
+        tiles = upper_triangle_tiles(n1, tile_size, k)
     else:
-        matrix = Parallel(n_jobs=n_jobs, prefer=parallel_method, verbose=verbose)(
-            delayed(dist_fun)(
-                dataset1[i], dataset2[j],
-                *args, **kwargs
-            )
-            for i in tqdm(range(len(dataset1)), disable=not progress_bar, desc='calculating distances') for j in range(len(dataset2))
-        )
-        return numpy.array(matrix).reshape((len(dataset1), -1))
\ No newline at end of file
+        k = None
+        tiles = [(i, j) for i in range(0, n1, tile_size) for j in range(0, n2, tile_size)]
+    
+    matrix = numpy.zeros((n1, n2))
+    results = compute_tiles(dist_fun, dataset1, dataset2, tiles, tile_size, *args, k=k, 
+                            n_jobs=n_jobs, verbose=verbose, progress_bar=progress_bar, parallel_method=parallel_method, 
+                            **kwargs)
+    for (i, j), tile in zip(tiles, results):
+        matrix[i:i + tile.shape[0], j:j + tile.shape[1]] = tile
+    
+    if k is not None: # self-similarity: copy the upper triangle to the lower one
+        indices = numpy.tril_indices(n1, k=-1, m=n1)
+        matrix[indices] = matrix.T[indices]
+    return matrix
+
+
+def default_tile_size(n, n_jobs=None):
+    """Tile size that gives about 4 tiles per job along each dimension of an n x n matrix."""
+    return max(1, int(numpy.ceil(n / (4 * effective_n_jobs(n_jobs)))))
+
+
+def upper_triangle_tiles(n, tile_size, k=0):
+    """Top left corners (row, column) of the tiles of an n x n matrix 
+    that intersect the part on and above its k-th diagonal."""
+    return [(i, j) for i in range(0, n, tile_size) for j in range(0, n, tile_size)
+            if j + tile_size - 1 - i >= k]
+
+
+def compute_tiles(dist_fun, dataset1, dataset2, tiles, tile_size, *args, k=None, n_jobs=None, verbose=0,
+                  progress_bar=False, parallel_method='processes', **kwargs):
+    """Compute tiles of a cross-similarity matrix in parallel (one joblib task per tile).
+
+    See `cdist_generic` for the parameters. `dataset2` can be `None` for 
+    self-similarity, `tiles` contains the top left corners (row, column) of 
+    the tiles, and if `k` is not `None`, only the elements on and above the 
+    k-th diagonal are computed (the others are 0). The parameters after 
+    `*args` are keyword-only, so that `*args` are passed to `dist_fun`.
+
+    Returns
+    -------
+    tiles : list of numpy.ndarray
+        Computed tiles in the order of `tiles`
+    """
+    if dataset2 is None:
+        dataset2 = dataset1
+    n1 = len(dataset1)
+    n2 = len(dataset2)
+    
+    def tile_task(i, j):
+        shape = (min(tile_size, n1 - i), min(tile_size, n2 - j))
+        data1, offset1 = _dataset_for_tile(dataset1, i, i + shape[0])
+        data2, offset2 = _dataset_for_tile(dataset2, j, j + shape[1])
+        return delayed(_cdist_tile)(dist_fun, data1, offset1, data2, offset2, shape, j - i, k, args, kwargs)
+    
+    return Parallel(n_jobs=n_jobs, prefer=parallel_method, verbose=verbose)(
+        tile_task(i, j)
+        for i, j in tqdm(tiles, disable=not progress_bar, desc='calculating distances (tiles)')
+    )
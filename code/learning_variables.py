@@ -20,6 +20,7 @@ from loguru import logger
 
 from classes.classes import Frames
 import tools.tools as tools
+import tools.storage as storage
 import questionnaire_variables.preprocess_quest_tools as preprocess
 
 parser = argparse.ArgumentParser(description= "A script to filter data")
@@ -30,13 +31,13 @@ parser.add_argument('-o', '--output_temps', type=str, required=True, help= 'The
 parser.add_argument('-p', '--output_quest', type=str, required=True, help= 'The output questionnaire dataset')
 
 def the_variables(INPUT_TEMPS, INPUT_QUEST, MODEL_CYCLE, OUTPUT_TEMPS, OUTPUT_QUEST):
-    temperatures = pd.read_csv(INPUT_TEMPS) #read the data
+    temperatures = storage.read_frame(INPUT_TEMPS) #read the data
     #temperatures_trimmed_out = tools.trimming_for_outliers(temperatures) #trim out outliers at the nadirs and peaks
     ## If I do not use the trimming above, ceycles with more than 9 days will be the length of the temperatures df##
 
     #temperatures_pcos = temperatures_trimmed_out[temperatures_trimmed_out["PCOS"] != 2] #select users with known PCOS values
 
-    quest = pd.read_csv(INPUT_QUEST)
+    quest = storage.read_frame(INPUT_QUEST)
 
     logger.info("================User Selection Started==================")
 
@@ -131,8 +132,8 @@ def the_variables(INPUT_TEMPS, INPUT_QUEST, MODEL_CYCLE, OUTPUT_TEMPS, OUTPUT_QU
     logger.info(f"Final Cycles Distribution: {counts}")
 
     #An intermediate dataset of the cleaned users dataset for examination of features
-    TEMP_SAVE = os.path.join("/".join(OUTPUT_TEMPS.split("/")[:-1]), "final_user_list_before_3_sampling.csv")
-    final_temp_df.to_csv(TEMP_SAVE, index=False)
+    TEMP_SAVE = os.path.join("/".join(OUTPUT_TEMPS.split("/")[:-1]), "final_user_list_before_3_sampling" + os.path.splitext(OUTPUT_TEMPS)[1])
+    storage.write_frame(final_temp_df, TEMP_SAVE, index=False)
     logger.info(f"Complete Cycle Level Variables: {TEMP_SAVE}")
     #final_temp_df.to_csv("/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/final_user_list_before_3_sampling.csv", index=False)
 
@@ -158,10 +159,10 @@ def the_variables(INPUT_TEMPS, INPUT_QUEST, MODEL_CYCLE, OUTPUT_TEMPS, OUTPUT_QU
     df_3_cycles = tools.select_3_cycles(dep_and_indep)
 
     #save the final result
-    df_3_cycles.to_csv(OUTPUT_TEMPS, index=False)
+    storage.write_frame(df_3_cycles, OUTPUT_TEMPS, index=False)
     logger.info(f"Cycle Level Variables of 3 Sampled Cycles per User: {OUTPUT_TEMPS}")
 
-    final_quest_ml.to_csv(OUTPUT_QUEST, index=False)
+    storage.write_frame(final_quest_ml, OUTPUT_QUEST, index=False)
     logger.info(f"Questionnaire Variables: {OUTPUT_QUEST}")
 
 
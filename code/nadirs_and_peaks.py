@@ -18,36 +18,52 @@ import seaborn as sns
 from dtaidistance import dtw_visualisation as dtwvis
 import random
 import argparse
-from multiprocess import Pool
+import tempfile
+import multiprocess
 from tqdm import tqdm
 
 from classes.classes import Frames
 import tools.data_extractor_ss as extract
 import tools.tools as tools
+from tools.cycle_temps import CycleTemps
+import tools.feature_cache as feature_cache
+import tools.storage as storage
 
 parser = argparse.ArgumentParser(description='A script for getting nairs and peaks using DTW')
 parser.add_argument('-i','--input_temps', type=str, required=True, help='The input temperatures dataset')
 parser.add_argument('-j','--input_cycles', type=str, required=True, help='The input cycles dataset')
 parser.add_argument('-m','--model_cycle', type=str, required=True, help='The location of the model cycle')
 parser.add_argument('-o','--output_file', type=str, required=True, help='The output file')
+parser.add_argument('-w','--workers', type=int, default=50, help='The number of worker processes (1: compute in this process) (DEFAULT: 50)')
+parser.add_argument('-c','--chunksize', type=int, default=1, help='The number of users sent to a worker at a time (DEFAULT: 1)')
+parser.add_argument('-s','--start_method', type=str, default=None, choices=['fork', 'spawn', 'forkserver'], help='The start method of the worker processes (DEFAULT: the platform default)')
+parser.add_argument('-f','--feature_cache', type=str, default=None, help='The file of the cache of the cycle level data (only the new and changed cycles are computed) (DEFAULT: no cache)')
 
-def users_cycles_and_temps(INPUT_TEMPS, INPUT_CYCLES, MODEL_CYCLE):
-    #read the temperatures dataset (from sel_crt_2)
-    logger.info("loading the temperatures dataset")
-    temp_sort = Frames(INPUT_TEMPS).read_temp() #read the temperatures
-    logger.info("temperatures dataset loaded")
+#increase when the extractors change, so that the cached cycle level data is computed again
+FEATURES_VERSION = 1
 
+#set in every worker (and in this process for the serial path) by init_worker
+grouped = None
+cycle_temps = None
+model_cycle = None
+
+def users_cycles_and_temps(INPUT_TEMPS, INPUT_CYCLES, MODEL_CYCLE):
     #read the cycles and questionnaire  dataset (from process_quest)
     logger.info("loading the cycles dataset")    
     cycles = Frames(INPUT_CYCLES).read_cycles_and_pcos()
     cycles = cycles[cycles["Date_Diff"] < 367] #Take out users with very long next cycles
     logger.info("cycles dataset loaded")
 
-    #Group the temperatures by the user IDs and cycle IDs
-    logger.info("grouping the temperatures dataset by User and Cycle IDs")   
+    #read the temperatures dataset (from sel_crt_2), only those of the cycles
+    logger.info("loading the temperatures dataset")
+    temp_sort = Frames(INPUT_TEMPS).read_temp(cycles=cycles["Cycle ID"].unique(), categorical_ids=True) #read the temperatures
+    logger.info("temperatures dataset loaded")
+
+    #Store the daily temperatures of every cycle in contiguous arrays (instead of grouping by the user IDs and cycle IDs)
+    logger.info("storing the temperatures dataset by User and Cycle IDs")   
     #group_temp = temp_final.groupby(["User ID", "Cycle ID"])
-    group_temp = temp_sort.groupby(["User ID", "Cycle ID"])
-    logger.info("temperatures dataset grouped by User and Cycle IDs")   
+    cycle_temps = CycleTemps.from_frame(temp_sort)
+    logger.info(f"temperatures of {len(cycle_temps)} cycles stored")   
 
     #Group the cycles by user IDs and cycle IDs
     logger.info("grouping the cycles dataset by User and Cycle IDs")   
@@ -59,21 +75,31 @@ def users_cycles_and_temps(INPUT_TEMPS, INPUT_CYCLES, MODEL_CYCLE):
     users = tools.get_users(grouped)
     logger.info("all users ready")  
     
-    #location of the model cycle
-    model_cycle = MODEL_CYCLE
+    #the model cycle and its anchors, loaded once (and shared with the worker processes)
+    model_cycle = tools.model_cycle_anchors(MODEL_CYCLE, key='model_cycle')
+
+    return (users, grouped, cycle_temps, model_cycle)
 
-    return (users, grouped, group_temp, model_cycle)
+def sorted_user_cycles(grouped, user):
+    return grouped.xs(user, level = 0).sort_values("Date_x")#get all users cycles and sort them by date
 
 def independent_variables(user):
-    user_cycles = grouped.xs(user, level = 0).sort_values("Date_x")#get all users cycles and sort them by date
+    return [cycle_est for cycle_est in cycles_features(user).values() if cycle_est is not None]
+
+def cycles_features(user, cycles=None):
+    #the features of the cycles of the user (all the cycles if cycles is None), by cycle (None for the cycles that are too short)
+    user_cycles = sorted_user_cycles(grouped, user)
     user_cycles_list = list(user_cycles.index) #wrap the cycles into a list
 
-    results = []
+    results = {}
 
     for cycle in user_cycles_list: #for each cycle
+        if cycles is not None and cycle not in cycles:
+            continue
+        results[cycle] = None
 
         ################Actual Cycle Days##################
-        actual_temp_vals = extract.actual_day(group_temp, user, cycle)
+        actual_temp_vals = extract.actual_day_columnar(cycle_temps, user, cycle)
         days = {"Days":list(actual_temp_vals.index)}
 
         if len(days["Days"]) > 9: #This has to be done because removing missing days will reduce some cycle lengths
@@ -97,17 +123,78 @@ def independent_variables(user):
             cycle_est = dict(nad_and_peak, **curve_distance, **days, **missing, **change_point, **temp_rise)
             #cycle_est = dict(nad_and_peak, **days, **missing)
 
-            results.append(cycle_est)
+            results[cycle] = cycle_est
             #print(days)
     return results
 
     #return(independent_variables('1NnOjBOgQQ'))
-def compute_features(users):
-    max_pool = 50
-    with Pool(max_pool) as p:
-        pool_outputs = list(tqdm(p.imap(independent_variables, users), total=len(users)))
+def init_worker(grouped_cycles, temps, model):
+    #temps: a CycleTemps, or the directory of its arrays (memory-mapped by every worker)
+    global grouped, cycle_temps, model_cycle
+    grouped = grouped_cycles
+    cycle_temps = CycleTemps.open_arrays(temps) if isinstance(temps, str) else temps
+    model_cycle = model
+
+def indexed_cycles_features(args):
+    i, user, cycles = args
+    return i, cycles_features(user, cycles)
+
+def compute_features(users, grouped, cycle_temps, model_cycle, workers=50, chunksize=1, start_method=None, cache=None):
+    #cache: a tools.feature_cache.FeatureCache (only the new and changed cycles are computed) or None
+    if cache is None:
+        tasks = [(i, user, None) for i, user in enumerate(users)]
+    else:
+        model_hash = feature_cache.model_cycle_hash(model_cycle)
+        keys = []
+        for user in users:
+            user_cycles = sorted_user_cycles(grouped, user)
+            keys.append({cycle: feature_cache.cycle_key(user, cycle, cycle_temps, row, model_hash, FEATURES_VERSION)
+                         for cycle, row in zip(user_cycles.index, user_cycles.itertuples(index=False))})
+        tasks = [(i, user, [cycle for cycle, key in keys[i].items() if key not in cache]) for i, user in enumerate(users)]
+        tasks = [task for task in tasks if len(task[2]) > 0]
+        n_cycles = sum(len(user_keys) for user_keys in keys)
+        n_computed = sum(len(task[2]) for task in tasks)
+        logger.info(f"{n_cycles - n_computed} of {n_cycles} cycles from the cache, computing {n_computed} cycles of {len(tasks)} users")
+
+    computed = map_features(tasks, grouped, cycle_temps, model_cycle, workers, chunksize, start_method)
+
+    if cache is None:
+        return [[cycle_est for cycle_est in computed[i].values() if cycle_est is not None] for i in range(len(users))]
+
+    pool_outputs = []
+    for i in range(len(users)):
+        features = computed.get(i, {})
+        for cycle, key in keys[i].items():
+            if cycle in features:
+                cache[key] = features[cycle]
+            else:
+                features[cycle] = cache[key]
+        pool_outputs.append([features[cycle] for cycle in keys[i] if features[cycle] is not None])
+    cache.save()
     return pool_outputs
 
+def map_features(tasks, grouped, cycle_temps, model_cycle, workers=50, chunksize=1, start_method=None):
+    #tasks: (position, user, cycles); returns the features of the cycles of every task, by position
+    #workers <= 1: compute in this process (for debugging and tests)
+    if len(tasks) == 0:
+        return {}
+    if workers <= 1:
+        init_worker(grouped, cycle_temps, model_cycle)
+        return dict(indexed_cycles_features(task) for task in tqdm(tasks))
+
+    #The workers get the data from init_worker instead of the globals of __main__ (which do not exist with spawn):
+    #the cycles of the users and the model cycle are sent once to every worker, and the temperatures are memory-mapped.
+    #The functions are taken from the nadirs_and_peaks module (also when this is __main__) so that they can be pickled by reference.
+    import nadirs_and_peaks as worker_module
+    computed = {}
+    with tempfile.TemporaryDirectory() as temps_dir:
+        cycle_temps.save_arrays(temps_dir)
+        context = multiprocess.get_context(start_method)
+        with context.Pool(workers, initializer=worker_module.init_worker, initargs=(grouped, temps_dir, model_cycle)) as p:
+            for i, features in tqdm(p.imap_unordered(worker_module.indexed_cycles_features, tasks, chunksize=chunksize), total=len(tasks)):
+                computed[i] = features
+    return computed
+
 def save_data(extracted, OUTPUT):
     data = [i for ls in extracted for i in ls]
     df = pd.DataFrame(data)
@@ -123,15 +210,17 @@ def save_data(extracted, OUTPUT):
     #logger.info("nadir and peak outliers trimmed out")
 
     logger.info("saving the cycle level data")
-    df.to_csv(OUTPUT)
+    storage.write_frame(df, OUTPUT)
     logger.info("process complete")  
 
 if __name__ == "__main__":
     args = parser.parse_args() #get the args variables
-    users, grouped, group_temp, model_cycle = users_cycles_and_temps(args.input_temps, args.input_cycles, args.model_cycle) #get the users, cycles and temperatures
+    users, grouped, cycle_temps, model_cycle = users_cycles_and_temps(args.input_temps, args.input_cycles, args.model_cycle) #get the users, cycles and temperatures
     
     logger.info("computing the cycle level data")  
-    extracted = compute_features(users=users) #get the cycle level data
+    extracted = compute_features(users, grouped, cycle_temps, model_cycle,
+                                 workers=args.workers, chunksize=args.chunksize, start_method=args.start_method,
+                                 cache=None if args.feature_cache is None else feature_cache.FeatureCache(args.feature_cache)) #get the cycle level data
     logger.info("cycle level data computed")  
 
     save_data(extracted, args.output_file) #save the data
@@ -7,58 +7,165 @@ import matplotlib.pyplot as plt
 from functools import reduce
 import pickle
 import json
+from functools import partial
+import time
+from multiprocess import Pool
+from multiprocess.pool import ThreadPool
 
 __author__ ="Francois Petitjean"
 
-def performDBA(series, n_iterations=10):
-    n_series = len(series)
+# The dynamic programming loops are compiled with Numba if it is available (otherwise the same code runs in Python).
+# They perform the same operations in the same order, so the results are identical either way.
+numba = None
+try:
+    import numba
+except ImportError:
+    numba = None
+
+def _compile(f):
+    if numba is None:
+        return f
+    return numba.njit(cache=True, nogil=True)(f) # nogil: the loops can run in parallel threads
+
+def performDBA(series, n_iterations=10, n_workers=1, use_threads=True,
+               tol=None, random_state=None, n_restarts=1, return_history=False):
+    """
+    n_workers > 1 compares the series to the center in parallel (threads, or processes if use_threads is False), 
+    or runs the restarts in parallel if n_restarts > 1.
+
+    tol: stop before n_iterations once an iteration decreases the inertia (the sum of squared DTW distances 
+         between the series and the center) by at most tol (relative to the previous inertia), 
+         and return the center with the lowest inertia.
+    random_state: seed (or np.random.RandomState) for the initialisation (DEFAULT: the global np.random).
+    n_restarts: number of runs; the first one starts from the approximate medoid and the others from 
+                randomly chosen series. The center with the lowest inertia is returned.
+    return_history: also return the inertia and the time (in seconds) of every iteration of every run
+                    (the inertia of iteration i is that of the center at the start of iteration i), 
+                    and the inertia of the returned center of every run ('best_inertia').
+    """
+    rng = random_state if isinstance(random_state, np.random.RandomState) else (
+          np.random if random_state is None else np.random.RandomState(random_state))
+    track_inertia = tol is not None or n_restarts > 1 or return_history
+
+    if n_restarts == 1:
+        pool = _make_pool(n_workers, use_threads)
+        try:
+            runs = [_run_DBA(series, n_iterations, tol, track_inertia, 'medoid', rng, pool)]
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+    else: # one run per task, every run has its own random state
+        seeds = rng.randint(np.iinfo(np.int32).max, size=n_restarts)
+        inits = ['medoid'] + ['random']*(n_restarts-1)
+        run = partial(_run_DBA_seeded, series, n_iterations, tol, track_inertia)
+        pool = _make_pool(n_workers, use_threads)
+        if pool is None:
+            runs = list(map(run, inits, seeds))
+        else:
+            with pool:
+                runs = pool.starmap(run, zip(inits, seeds))
+
+    best_run = int(np.argmin([history['best_inertia'] if track_inertia else 0 for _, history in runs]))
+    center = runs[best_run][0]
+    if return_history:
+        return center, {'runs': [history for _, history in runs], 'best_run': best_run}
+    return center
+
+def _run_DBA_seeded(series, n_iterations, tol, track_inertia, init, seed):
+    return _run_DBA(series, n_iterations, tol, track_inertia, init, np.random.RandomState(seed), None)
+
+def _run_DBA(series, n_iterations, tol, track_inertia, init, rng, pool):
+    # one run of DBA; if track_inertia, the center with the lowest inertia is returned 
+    # (one more alignment is needed to compute the inertia of the last center)
     max_length = reduce(max, map(len, series))
 
     cost_mat = np.zeros((max_length, max_length))
     delta_mat = np.zeros((max_length, max_length))
     path_mat = np.zeros((max_length, max_length), dtype=np.int8)
 
-    medoid_ind = approximate_medoid_index(series,cost_mat,delta_mat)
-    center = series[medoid_ind]
+    if init == 'medoid':
+        center = series[approximate_medoid_index(series,cost_mat,delta_mat,pool=pool,rng=rng)]
+    else:
+        center = series[rng.randint(len(series))]
 
-    for i in range(0,n_iterations):
-        center = DBA_update(center, series, cost_mat, path_mat, delta_mat)
+    history = {'inertia': [], 'time': []}
+    best_center, best_inertia = center, np.inf
+    for i in range(0, n_iterations + (1 if track_inertia else 0)):
+        start = time.perf_counter()
+        updated_center, inertia = _DBA_update(center, series, cost_mat, path_mat, delta_mat, pool=pool)
+        history['time'].append(time.perf_counter() - start)
+        history['inertia'].append(inertia)
+        if track_inertia:
+            if inertia < best_inertia:
+                best_center, best_inertia = center, inertia
+            if i == n_iterations or (tol is not None and i > 0 and 
+                                     history['inertia'][-2] - inertia <= tol*history['inertia'][-2]):
+                break
+        center = updated_center
 
-    return center
+    if track_inertia:
+        history['best_inertia'] = best_inertia # the inertia of the returned center
+        return best_center, history
+    return center, history
 
-def approximate_medoid_index(series,cost_mat,delta_mat):
+def _make_pool(n_workers, use_threads):
+    if n_workers is None or n_workers == 1:
+        return None
+    if use_threads:
+        return ThreadPool(n_workers)
+    return Pool(n_workers)
+
+def approximate_medoid_index(series,cost_mat,delta_mat,pool=None,rng=np.random):
     if len(series)<=50:
         indices = range(0,len(series))
     else:
-        indices = np.random.choice(range(0,len(series)),50,replace=False)
+        indices = rng.choice(range(0,len(series)),50,replace=False)
 
     medoid_ind = -1
     best_ss = 1e20
     for index_candidate in indices:
         candidate = series[index_candidate]
-        ss = sum_of_squares(candidate,series,cost_mat,delta_mat)
+        ss = sum_of_squares(candidate,series,cost_mat,delta_mat,pool=pool)
         if(medoid_ind==-1 or ss<best_ss):
             best_ss = ss
             medoid_ind = index_candidate
     return medoid_ind
 
-def sum_of_squares(s,series,cost_mat,delta_mat):
-    return sum(map(lambda t:squared_DTW(s,t,cost_mat,delta_mat),series))
+def sum_of_squares(s,series,cost_mat,delta_mat,pool=None):
+    if pool is None:
+        return sum(map(lambda t:squared_DTW(s,t,cost_mat,delta_mat),series))
+    # every task has its own matrices; the distances are summed in the same order as above
+    return sum(pool.map(partial(_squared_DTW_own_matrices, s), series))
 
 def DTW(s,t,cost_mat,delta_mat):
     return np.sqrt(squared_DTW(s,t,cost_mat,delta_mat))
 
 def squared_DTW(s,t,cost_mat,delta_mat):
-    s_len = len(s)
-    t_len = len(t)
-    length = len(s)
     fill_delta_mat_dtw(s, t, delta_mat)
+    return _fill_cost_mat(cost_mat, delta_mat, _NO_PATH_MAT, len(s), len(t), False)
+
+def _squared_DTW_own_matrices(s, t):
+    return squared_DTW(s, t, np.zeros((len(s), len(t))), np.zeros((len(s), len(t))))
+
+_NO_PATH_MAT = np.zeros((1, 1), dtype=np.int8)
+
+@_compile
+def _fill_cost_mat(cost_mat, delta_mat, path_mat, s_len, t_len, with_path):
+    # accumulated cost (and, if with_path, the step into every cell: 0 diagonal, 1 left, 2 top, -1 start)
     cost_mat[0, 0] = delta_mat[0, 0]
+    if with_path:
+        path_mat[0, 0] = -1
+
     for i in range(1, s_len):
         cost_mat[i, 0] = cost_mat[i-1, 0]+delta_mat[i, 0]
+        if with_path:
+            path_mat[i, 0] = 2
 
     for j in range(1, t_len):
         cost_mat[0, j] = cost_mat[0, j-1]+delta_mat[0, j]
+        if with_path:
+            path_mat[0, j] = 1
 
     for i in range(1, s_len):
         for j in range(1, t_len):
@@ -66,74 +173,84 @@ def squared_DTW(s,t,cost_mat,delta_mat):
             if(diag <=left):
                 if(diag<=top):
                     res = diag
+                    step = 0
                 else:
                     res = top
+                    step = 2
             else:
                 if(left<=top):
                     res = left
+                    step = 1
                 else:
                     res = top
+                    step = 2
+            if with_path:
+                path_mat[i, j] = step
             cost_mat[i, j] = res+delta_mat[i, j]
     return cost_mat[s_len-1,t_len-1]
 
+@_compile
+def _warping_path(path_mat, center_length, s_len):
+    # indices (in the center and in the series) along the optimal warping path, from the end to the start
+    path_center = np.zeros(center_length+s_len, dtype=np.int64)
+    path_series = np.zeros(center_length+s_len, dtype=np.int64)
+    i = center_length-1
+    j = s_len-1
+    n = 0
+    while(path_mat[i, j] != -1):
+        path_center[n] = i
+        path_series[n] = j
+        n += 1
+        move = path_mat[i, j]
+        if move == 0:
+            i -= 1
+            j -= 1
+        elif move == 1:
+            j -= 1
+        else:
+            i -= 1
+    assert(i == 0 and j == 0)
+    path_center[n] = i
+    path_series[n] = j
+    n += 1
+    return path_center[:n], path_series[:n]
+
 def fill_delta_mat_dtw(center, s, delta_mat):
     slim = delta_mat[:len(center),:len(s)]
     np.subtract.outer(center, s,out=slim)
     np.square(slim, out=slim)
 
-def DBA_update(center, series, cost_mat, path_mat, delta_mat):
-    options_argmin = [(-1, -1), (0, -1), (-1, 0)]
-    updated_center = np.zeros(center.shape)
-    n_elements = np.array(np.zeros(center.shape), dtype=int)
-    center_length = len(center)
-    for s in series:
-        s_len = len(s)
-        fill_delta_mat_dtw(center, s, delta_mat)
-        cost_mat[0, 0] = delta_mat[0, 0]
-        path_mat[0, 0] = -1
-
-        for i in range(1, center_length):
-            cost_mat[i, 0] = cost_mat[i-1, 0]+delta_mat[i, 0]
-            path_mat[i, 0] = 2
-
-        for j in range(1, s_len):
-            cost_mat[0, j] = cost_mat[0, j-1]+delta_mat[0, j]
-            path_mat[0, j] = 1
-
-        for i in range(1, center_length):
-            for j in range(1, s_len):
-                diag,left,top =cost_mat[i-1, j-1], cost_mat[i, j-1], cost_mat[i-1, j]
-                if(diag <=left):
-                    if(diag<=top):
-                        res = diag
-                        path_mat[i,j] = 0
-                    else:
-                        res = top
-                        path_mat[i,j] = 2
-                else:
-                    if(left<=top):
-                        res = left
-                        path_mat[i,j] = 1
-                    else:
-                        res = top
-                        path_mat[i,j] = 2
+def _DBA_path(center, s, cost_mat, path_mat, delta_mat):
+    # optimal warping path and squared DTW distance between the center and the series
+    fill_delta_mat_dtw(center, s, delta_mat)
+    squared_dist = _fill_cost_mat(cost_mat, delta_mat, path_mat, len(center), len(s), True)
+    return _warping_path(path_mat, len(center), len(s)), squared_dist
 
-                cost_mat[i, j] = res+delta_mat[i, j]
+def _DBA_path_own_matrices(center, s):
+    shape = (len(center), len(s))
+    return _DBA_path(center, s, np.zeros(shape), np.zeros(shape, dtype=np.int8), np.zeros(shape))
 
-        i = center_length-1
-        j = s_len-1
+def DBA_update(center, series, cost_mat, path_mat, delta_mat, pool=None):
+    return _DBA_update(center, series, cost_mat, path_mat, delta_mat, pool=pool)[0]
 
-        while(path_mat[i, j] != -1):
+def _DBA_update(center, series, cost_mat, path_mat, delta_mat, pool=None):
+    # updated center, and inertia of the (given) center
+    updated_center = np.zeros(center.shape)
+    n_elements = np.array(np.zeros(center.shape), dtype=int)
+    if pool is None:
+        paths = (_DBA_path(center, s, cost_mat, path_mat, delta_mat) for s in series)
+    else:
+        # every task has its own matrices
+        paths = pool.map(partial(_DBA_path_own_matrices, center), series)
+    inertia = 0
+    # the series are added to the center in the same order whether or not they are aligned in parallel:
+    for s, ((path_center, path_series), squared_dist) in zip(series, paths):
+        for i, j in zip(path_center, path_series):
             updated_center[i] += s[j]
             n_elements[i] += 1
-            move = options_argmin[path_mat[i, j]]
-            i += move[0]
-            j += move[1]
-        assert(i == 0 and j == 0)
-        updated_center[i] += s[j]
-        n_elements[i] += 1
-
-    return np.divide(updated_center, n_elements)
+        inertia += squared_dist
+
+    return np.divide(updated_center, n_elements), inertia
 
 def save_model_cycle(model_cycle, OUTPUT):
     try:
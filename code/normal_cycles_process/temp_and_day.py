@@ -38,19 +38,7 @@ def actual_day(user, cycle, group_temp):
     df_reindexed = pd.DataFrame(cycle_temp.reindex(pd.date_range(start, end)).isnull().all(1), columns=["Missing_Day"])
     temperature_vals = pd.merge(cycle_temp,  df_reindexed, left_on=cycle_temp.index, right_on= df_reindexed.index, how = "outer", sort = True)
     
-    temperature_vals["Missing_length"] = 0
-
-    for i in (temperature_vals[temperature_vals["Missing_Day"] == True].index):
-        last_day_before_miss = temperature_vals.iloc[0:i][temperature_vals.iloc[0:i]["Missing_Day"] == False].tail(1).index
-        first_day_after_miss = temperature_vals.iloc[i:][temperature_vals.iloc[i:]["Missing_Day"] == False].head(1).index
-        
-        temperature_vals.loc[i, "Missing_length"] = first_day_after_miss - last_day_before_miss - 1
-        
-    try:    
-        missed = temperature_vals[temperature_vals["Missing_length"] > 10].head(1).index.values[0] #if there are more than 10 missing days
-        temperature_vals = temperature_vals.iloc[0:missed] #drop all recordings after 10 missing days
-    except IndexError:
-        temperature_vals = temperature_vals #otherwise keep all temperatures with the missing dates
+    temperature_vals = tools.drop_after_missing_gap(temperature_vals, max_gap=10) #drop all recordings after more than 10 missing days
     
     temperature_vals["Mean_Temp"] = temperature_vals["Mean_Temp"].interpolate(method = "linear", limit_direction = "forward")
     temperature_vals["Cycle ID"] = temperature_vals["Cycle ID"].fillna(method = "pad") #fill the missing cycle IDs
@@ -78,19 +66,7 @@ def model_temps_process(cycle, grouped_temps):
     temperature_vals = pd.merge(cycle_temp,  df_reindexed, left_on=cycle_temp.index, right_on= df_reindexed.index, how = "outer", sort = True)
     
     #This set of code lines drops records after 10 consequtive days of missing values
-    temperature_vals["Missing_length"] = 0
-
-    for i in (temperature_vals[temperature_vals["Missing_Day"] == True].index):
-        last_day_before_miss = temperature_vals.iloc[0:i][temperature_vals.iloc[0:i]["Missing_Day"] == False].tail(1).index
-        first_day_after_miss = temperature_vals.iloc[i:][temperature_vals.iloc[i:]["Missing_Day"] == False].head(1).index
-        
-        temperature_vals.loc[i, "Missing_length"] = first_day_after_miss - last_day_before_miss - 1
-        
-    try:    
-        missed = temperature_vals[temperature_vals["Missing_length"] > 10].head(1).index.values[0] #if there are more than 10 missing days
-        temperature_vals = temperature_vals.iloc[0:missed] #drop all recordings after 10 missing days
-    except IndexError:
-        temperature_vals = temperature_vals #otherwise keep all temperatures with the missing dates
+    temperature_vals = tools.drop_after_missing_gap(temperature_vals, max_gap=10) #drop all recordings after more than 10 missing days
     
     temperature_vals["Mean_Temp"] = temperature_vals["Mean_Temp"].interpolate(method = "linear", limit_direction = "forward")
     temperature_vals["Cycle ID"] = temperature_vals["Cycle ID"].ffill() #fill the missing cycle IDs
@@ -31,6 +31,7 @@ import matplotlib.pyplot as plt
 from scipy.signal import savgol_filter
 import argparse
 from classes.classes import Frames
+import tools.storage as storage
 pd.options.mode.chained_assignment = None
 
 parser = argparse.ArgumentParser(description= "A script to process the cycles")
@@ -44,12 +45,7 @@ def process_cycles(INPUT_CYCLES, INPUT_TEMPS, OUTPUT):
     FOLDER = glob.glob(PATH)
 
     #combine the allusercycles files
-    df = pd.DataFrame()
-    for file in FOLDER:
-        data = pd.read_csv(file)
-        df = pd.concat([df,data], axis = 0)
-        dataset_name = file.split("/")[-1]
-        logger.info(dataset_name+" loaded")
+    df = storage.read_shards(FOLDER)
 
     logger.info("Datasets merged")
     cycles_sort = df.sort_values("Date").reset_index(drop = True)
@@ -79,55 +75,28 @@ def process_cycles(INPUT_CYCLES, INPUT_TEMPS, OUTPUT):
     grouped = grouped[~(grouped["Date_y"].isnull())]
     logger.info("Null cycle start dates removed")
 
-    #routine to get the users
-    def get_users(grouped_data):
-        usershat = []
-        for key, group in grouped_data.index:
-            if key not in usershat:
-                usershat.append(key)
-        return usershat
-
     #routine to compute the cycle lengths
-    def cycle_lengths(usershat, groupedhat):
-        grouped_date_diff = pd.DataFrame()
-        #get the cycles for each user
-        for i in usershat:
-            user_cycles = groupedhat.xs(i, level= 0).sort_values("Date_x")
-            user_cycles["Date_Diff"] = ""
+    def cycle_lengths(groupedhat):
+        #the cycles of every user sorted by the first date of temperature recording (the users in order)
+        user_cycles = groupedhat.reset_index().sort_values(["User ID_x", "Date_x"], kind = "stable")
 
         #get the difference between each cycles using the recorded dates on the cycles table
-        #note: [j, 6] or date_y is the date indicated by a user as the start of the cycle
-        #note: [j, 3] or date_x is first date of temperature recording
-        
-            for j in range(len(user_cycles)-1):
-                #get the start date of the current record
-                y = user_cycles.iloc[j,6]
-
-                #get the start date of the succeeding record
-                x = user_cycles.iloc[j+1,6]
-                
-                #now initiate the action
-                try:
-                    z = int(float(str((x) - (y)).split(" ")[0]))
-                    #if z > 0:
-                    user_cycles.iloc[j,13] = z
-                except (ValueError) as e:
-                    user_cycles.iloc[j,13] = "Indeterminate Cycle Length"
-
-            #this is for the last cycles
-            user_cycles.iloc[len(user_cycles)-1,13] = "Indeterminate Last Cycle"
-            grouped_date_diff = pd.concat([grouped_date_diff, user_cycles], axis = 0)
-        return grouped_date_diff
+        #note: date_y is the date indicated by a user as the start of the cycle
+        #note: date_x is first date of temperature recording
+        next_start = user_cycles.groupby("User ID_x", sort = False)["Date_y"].shift(-1)
+        last_cycle = next_start.isnull()
+        date_diff = (next_start - user_cycles["Date_y"]).dt.days.fillna(0).astype(np.int64).astype(object)
+
+        #this is for the last cycles
+        date_diff[last_cycle] = "Indeterminate Last Cycle"
+        user_cycles["Date_Diff"] = date_diff
+        return user_cycles.drop(columns = "User ID_x").reset_index(drop = True)
 
     #routine to compute the temperature date offsets
     def date_offsets(df):
-        df["Offset"] = ""
-        #note: [j, 6] or date_y is the date indicated by a user as the start of the cycle
-        #note: [j, 3] or date_x is first date of temperature recording
-        for i in range(len(df)):
-            x = df.loc[i, "Date_x"]
-            y = df.loc[i, "Date_y"]
-            df.loc[i, "Offset"] =  int(str(x - y).split(" ")[0])
+        #note: date_y is the date indicated by a user as the start of the cycle
+        #note: date_x is first date of temperature recording
+        df["Offset"] = (df["Date_x"] - df["Date_y"]).dt.days
         return df
 
     # def cycle_completeness(df):
@@ -159,11 +128,7 @@ def process_cycles(INPUT_CYCLES, INPUT_TEMPS, OUTPUT):
     def data_duration(df_temp, df_offsets):
         temp_dates = df_temp.groupby("Cycle ID").agg(Min_date = ("Date", "min"), Max_date = ("Date", "max")).reset_index()
         temp_dates["Min_date"], temp_dates["Max_date"] = pd.to_datetime(temp_dates["Min_date"]), pd.to_datetime(temp_dates["Max_date"])
-        
-        for i in range(len(temp_dates)):
-            temp_dates.loc[i, "Data_Dur"] = int(str(temp_dates.loc[i, "Max_date"] - temp_dates.loc[i, "Min_date"]).split(" ")[0]) + 1
-            #temp_dates["Data_Dur"] = temp_dates["Data_Dur"].apply(lambda x: int(x.split(" ")[0]))
-            #temp_dates["Data_Dur"] = temp_dates["Data_Dur"].apply(lambda x: str(x).split(" ")[0])
+        temp_dates["Data_Dur"] = ((temp_dates["Max_date"] - temp_dates["Min_date"]).dt.days + 1).astype(float)
 
         df_cycles_full = pd.merge(temp_dates, df_offsets, left_on= "Cycle ID", right_on="Cycle ID", how = "inner")
         #dates_duration = cycle_completeness(df_cycles_full)
@@ -171,13 +136,8 @@ def process_cycles(INPUT_CYCLES, INPUT_TEMPS, OUTPUT):
         #return dates_duration
         return df_cycles_full
 
-    #get the users
-    users = get_users(grouped)
-    logger.info("users' list created")
-
     #compute the cycle lengths
-    lengths =  cycle_lengths(users, grouped)
-    lengths.reset_index(inplace = True)
+    lengths =  cycle_lengths(grouped)
     logger.info("Cycle lengths computed")
 
     #compute the date offsets
@@ -188,7 +148,7 @@ def process_cycles(INPUT_CYCLES, INPUT_TEMPS, OUTPUT):
     temp_dates_duration = data_duration(temp_sort, offsets)
     logger.info("temperatures duration computed")
 
-    temp_dates_duration.to_csv(OUTPUT)
+    storage.write_frame(temp_dates_duration, OUTPUT)
     logger.info("Completed: Dataset ready and saved")
 
 if __name__ == "__main__":
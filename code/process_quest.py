@@ -19,6 +19,7 @@ from classes.classes import Frames
 import argparse
 from functools import reduce
 import tools.tools as tools
+import tools.storage as storage
 from questionnaire_variables.get_quest_variables import Quest_data
 
 parser = argparse.ArgumentParser(description='A script for initial data cleaning')
@@ -81,7 +82,7 @@ def process_quest(INPUT, INPUT_CYCLES, OUTPUT, CLEANED_QUEST):
 
     df_questionnaire_final = reduce(lambda left, right: pd.merge(left, right, on = "User ID", how = "outer"), data_frames)
 
-    df_questionnaire_final.to_csv(CLEANED_QUEST, index=False)
+    storage.write_frame(df_questionnaire_final, CLEANED_QUEST, index=False)
     
     #get the cycles processed from process cycles
     cycles = Frames(INPUT_CYCLES).the_cycles_temp_dates_duration()
@@ -95,14 +96,13 @@ def process_quest(INPUT, INPUT_CYCLES, OUTPUT, CLEANED_QUEST):
         cycles, df_new, left_on="User ID_y", right_on="User ID", how = "left"
         )
 
-    for i in range(len(temp_dates_duration_pcos)):
-        if pd.isnull(temp_dates_duration_pcos['PCOS'][i]):
-            temp_dates_duration_pcos.loc[i,'PCOS'] = 3
+    #the users without questionnaire data are coded as 3
+    temp_dates_duration_pcos['PCOS'] = tools.fill_missing_pcos(temp_dates_duration_pcos['PCOS'])
     
     #Get Complete cycles
     temp_dates_duration_pcos = tools.cycle_completeness(temp_dates_duration_pcos)
 
-    temp_dates_duration_pcos.to_csv(OUTPUT)
+    storage.write_frame(temp_dates_duration_pcos, OUTPUT)
 
 
 if __name__ == "__main__":
@@ -17,7 +17,9 @@
 import numpy as np
 import pandas as pd
 import argparse
+import itertools
 import os
+import tools.storage as storage
 
 pd.options.mode.chained_assignment = None 
 
@@ -27,41 +29,63 @@ parser.add_argument('-o','--output_file', type=str, required=True, help='The out
 parser.add_argument('-x','--min_data', type=int, required=True, help='Minimum number of true data')
 parser.add_argument('-y','--init_data', type=int, required=True, help='Number of initial data to take out')
 
-def remove_nan(temp):
-#Removal of NaN, 34500.0 and 0.0
-    j = []
-    for i in temp:
-        floated = float(i)
-        if (str(floated) != "nan") & (str(floated) != "34500.0") & (str(floated) != "0.0"):
-            j.append(floated)
-    return j
+def data_arrays(data):
+    #the values of all the records in one float array, with the offsets of the records (the record k is values[offsets[k]:offsets[k+1]])
+    lengths = data.map(len).to_numpy()
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    values = np.array(list(itertools.chain.from_iterable(data)), dtype=np.float64).reshape(-1)
+    return offsets, values
+
+def remove_nan(values):
+#Removal of NaN, 34500.0 and 0.0 (not -0.0, which the previous string comparison kept)
+    return ~(np.isnan(values) | (values == 34500.0) | ((values == 0.0) & ~np.signbit(values)))
 
 def compute_mean(INPUT, OUTPUT, x, y):
     """
     This ensures each record have a minimum number of data (x), removes a specified
     number of initial data (y) and computes the average of the values
     """
-    data = pd.read_csv(INPUT, index_col="prime")
-    data["Data"] = data["Data"].apply(lambda x: x.replace('[', "").replace(']', "").replace("'", "").split(', '))
-    
-    data["Data_2"] = data["Data"].apply(remove_nan)
+    data = storage.read_frame(INPUT, index_col="prime")
+    data["Data"] = data["Data"].apply(lambda x: x.replace('[', "").replace(']', "").replace("'", "").split(', ') if isinstance(x, str) else list(x)) #a list column in Parquet
+
+    #all the values in one array (read as numbers from the list column of a Parquet file), with the invalid values removed
+    if storage.is_csv(INPUT):
+        offsets, values = data_arrays(data["Data"])
+    else:
+        data_values = storage.read_ragged(INPUT, "Data")
+        offsets, values = data_values.offsets, data_values.values
+    keep = remove_nan(values)
+    kept_before = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(keep, out=kept_before[1:])
+    kept_offsets = kept_before[offsets] #the offsets of the records in the kept values
+    kept_values = values[keep]
+    data["Data_2"] = [record.tolist() for record in np.split(kept_values, kept_offsets[1:-1])]
 
-    
     #4a.Getting the length of each data field
-    data["Data_len"] = data["Data_2"].apply(lambda x: len(x))
+    data_len = np.diff(kept_offsets)
+    data["Data_len"] = data_len
         
     #4a. Getting rows with more than x data
-    data_new = data[data['Data_len'] >= x]
+    selected = data_len >= x
+    data_new = data[selected]
     #df_new.drop("Data_len", axis = 1, inplace = True)
     
-    #4b. removing y initial data
-    data_new['Data_to_Compute'] = data_new["Data_2"].apply(lambda j: j[y:])
+    #4b. removing y initial data (the position of every kept value in its record)
+    positions = np.arange(len(kept_values)) - np.repeat(kept_offsets[:-1], data_len)
+    to_compute = (positions >= y) & np.repeat(selected, data_len)
+    counts = np.maximum(data_len[selected] - y, 0)
+    starts = np.zeros(len(counts), dtype=np.int64)
+    np.cumsum(counts[:-1], out=starts[1:])
     
      #4c. getting the average data values
-    data_new["Mean_Temp"] = data_new['Data_to_Compute'].apply(lambda x: np.array(x).mean().round(0).astype(int))
-    data_new.drop("Data_to_Compute", axis = 1, inplace = True)
+    sums = np.zeros(len(counts))
+    if np.any(counts > 0): #the empty records are skipped (reduceat does not give 0 for them)
+        sums[counts > 0] = np.add.reduceat(kept_values[to_compute], starts[counts > 0])
+    with np.errstate(invalid="ignore"):
+        data_new["Mean_Temp"] = (sums / counts).round(0).astype(int)
     #data_new.to_csv("data/sel_crt_2.csv")
-    data_new.to_csv(OUTPUT)
+    storage.write_frame(data_new, OUTPUT)
     
 if __name__ == "__main__":
     args = parser.parse_args()
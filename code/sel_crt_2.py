@@ -18,6 +18,7 @@ import numpy as np
 import pandas as pd
 import os
 import argparse
+import tools.storage as storage
 
 parser = argparse.ArgumentParser(description= "A script to filter data")
 parser.add_argument('-i', '--input_file', type=str, required=True, help= 'The input dataset')
@@ -27,7 +28,7 @@ parser.add_argument('-n', '--min_days', type=int, required=True, help= 'Minimum
 parser.add_argument('-c', '--min_cycles', type=int, required=True, help= 'Minimum number of cycles for a user')
 
 def process_temp(INPUT, OUTPUT, x, y, z):
-    temperatures = pd.read_csv(INPUT, index_col="prime")
+    temperatures = storage.read_frame(INPUT, index_col="prime")
 
     temperatures['Start Time'] = pd.to_datetime(temperatures['Start Time']) #Convert date object to datetime
     temperatures['Date'] = temperatures['Start Time'].dt.date #Getting the date
@@ -60,9 +61,8 @@ def process_temp(INPUT, OUTPUT, x, y, z):
 
     #clean_4.to_csv("data/sel_crt_1.csv")
     
-    clean_4[["User ID","Cycle ID","Raw Temp","Smooth Temp",\
-    	"Start Time","Data","Data_2","Data_len","Mean_Temp","Date","Time"]]\
-        .to_csv(OUTPUT)
+    storage.write_frame(clean_4[["User ID","Cycle ID","Raw Temp","Smooth Temp",\
+    	"Start Time","Data","Data_2","Data_len","Mean_Temp","Date","Time"]], OUTPUT)
     #return clean_4
 if __name__ == "__main__":
     args = parser.parse_args()
@@ -0,0 +1,232 @@
+# Test the compiled DBA loops and their parallel fan-out against the original Python loops, and the options of performDBA
+
+from functools import reduce
+import numpy as np
+import pytest
+
+import normal_cycles_process.DBA as DBA
+
+
+# The original loops (https://github.com/fpetitjean/DBA/blob/master/DBA.py), used as the reference:
+def reference_squared_DTW(s, t, cost_mat, delta_mat):
+    s_len = len(s)
+    t_len = len(t)
+    DBA.fill_delta_mat_dtw(s, t, delta_mat)
+    cost_mat[0, 0] = delta_mat[0, 0]
+    for i in range(1, s_len):
+        cost_mat[i, 0] = cost_mat[i-1, 0]+delta_mat[i, 0]
+
+    for j in range(1, t_len):
+        cost_mat[0, j] = cost_mat[0, j-1]+delta_mat[0, j]
+
+    for i in range(1, s_len):
+        for j in range(1, t_len):
+            diag,left,top =cost_mat[i-1, j-1], cost_mat[i, j-1], cost_mat[i-1, j]
+            if(diag <=left):
+                if(diag<=top):
+                    res = diag
+                else:
+                    res = top
+            else:
+                if(left<=top):
+                    res = left
+                else:
+                    res = top
+            cost_mat[i, j] = res+delta_mat[i, j]
+    return cost_mat[s_len-1,t_len-1]
+
+
+def reference_DBA_update(center, series, cost_mat, path_mat, delta_mat):
+    options_argmin = [(-1, -1), (0, -1), (-1, 0)]
+    updated_center = np.zeros(center.shape)
+    n_elements = np.array(np.zeros(center.shape), dtype=int)
+    center_length = len(center)
+    for s in series:
+        s_len = len(s)
+        DBA.fill_delta_mat_dtw(center, s, delta_mat)
+        cost_mat[0, 0] = delta_mat[0, 0]
+        path_mat[0, 0] = -1
+
+        for i in range(1, center_length):
+            cost_mat[i, 0] = cost_mat[i-1, 0]+delta_mat[i, 0]
+            path_mat[i, 0] = 2
+
+        for j in range(1, s_len):
+            cost_mat[0, j] = cost_mat[0, j-1]+delta_mat[0, j]
+            path_mat[0, j] = 1
+
+        for i in range(1, center_length):
+            for j in range(1, s_len):
+                diag,left,top =cost_mat[i-1, j-1], cost_mat[i, j-1], cost_mat[i-1, j]
+                if(diag <=left):
+                    if(diag<=top):
+                        res = diag
+                        path_mat[i,j] = 0
+                    else:
+                        res = top
+                        path_mat[i,j] = 2
+                else:
+                    if(left<=top):
+                        res = left
+                        path_mat[i,j] = 1
+                    else:
+                        res = top
+                        path_mat[i,j] = 2
+
+                cost_mat[i, j] = res+delta_mat[i, j]
+
+        i = center_length-1
+        j = s_len-1
+
+        while(path_mat[i, j] != -1):
+            updated_center[i] += s[j]
+            n_elements[i] += 1
+            move = options_argmin[path_mat[i, j]]
+            i += move[0]
+            j += move[1]
+        assert(i == 0 and j == 0)
+        updated_center[i] += s[j]
+        n_elements[i] += 1
+
+    return np.divide(updated_center, n_elements)
+
+
+def reference_performDBA(series, n_iterations=10):
+    max_length = reduce(max, map(len, series))
+
+    cost_mat = np.zeros((max_length, max_length))
+    delta_mat = np.zeros((max_length, max_length))
+    path_mat = np.zeros((max_length, max_length), dtype=np.int8)
+
+    medoid_ind, best_ss = -1, 1e20
+    for index_candidate in range(0, len(series)): # (at most 50 series, so all of them are candidates)
+        ss = sum(reference_squared_DTW(series[index_candidate], t, cost_mat, delta_mat) for t in series)
+        if(medoid_ind==-1 or ss<best_ss):
+            best_ss = ss
+            medoid_ind = index_candidate
+    center = series[medoid_ind]
+
+    for i in range(0,n_iterations):
+        center = reference_DBA_update(center, series, cost_mat, path_mat, delta_mat)
+    return center
+
+
+def random_series(seed, n_series=8, min_length=5, max_length=15):
+    rng = np.random.RandomState(seed)
+    series = [rng.normal(36.5, 0.3, rng.randint(min_length, max_length+1)) for _ in range(n_series)]
+    series.append(np.round(series[0], 1)) # (rounded values give ties between the steps)
+    return series
+
+
+def matrices(series):
+    max_length = max(map(len, series))
+    shape = (max_length, max_length)
+    return np.zeros(shape), np.zeros(shape, dtype=np.int8), np.zeros(shape)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_squared_DTW(seed):
+    # Test that the compiled squared DTW distance is the one of the original loops, for every pair of series:
+    series = random_series(seed)
+    cost_mat, _, delta_mat = matrices(series)
+    for s in series:
+        for t in series:
+            expected = reference_squared_DTW(s, t, cost_mat, delta_mat)
+            assert DBA.squared_DTW(s, t, cost_mat, delta_mat) == pytest.approx(expected, rel=1e-12)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_DBA_path(seed):
+    # Test that the compiled warping path follows the steps of the original loops:
+    series = random_series(seed)
+    cost_mat, path_mat, delta_mat = matrices(series)
+    ref_cost_mat, ref_path_mat, ref_delta_mat = matrices(series)
+    center = series[1]
+    for s in series:
+        (path_center, path_series), squared_dist = DBA._DBA_path(center, s, cost_mat, path_mat, delta_mat)
+        reference_DBA_update(center, [s], ref_cost_mat, ref_path_mat, ref_delta_mat)
+        assert squared_dist == pytest.approx(ref_cost_mat[len(center)-1, len(s)-1], rel=1e-12)
+        np.testing.assert_array_equal(path_mat[:len(center), :len(s)], ref_path_mat[:len(center), :len(s)])
+        # the path goes from the end to the start by one step at a time:
+        assert (path_center[0], path_series[0]) == (len(center)-1, len(s)-1)
+        assert (path_center[-1], path_series[-1]) == (0, 0)
+        steps = np.stack([-np.diff(path_center), -np.diff(path_series)], axis=1)
+        assert set(map(tuple, steps)) <= {(1, 1), (0, 1), (1, 0)}
+
+
+@pytest.mark.parametrize("n_workers, use_threads", [(1, True), (2, True), (2, False)])
+def test_DBA_update(n_workers, use_threads):
+    # Test that the updated center and the inertia are those of the original loops, serially and in parallel:
+    series = random_series(3)
+    cost_mat, path_mat, delta_mat = matrices(series)
+    center = series[2]
+    expected = reference_DBA_update(center, series, *matrices(series))
+    expected_inertia = sum(reference_squared_DTW(center, s, cost_mat, delta_mat) for s in series)
+
+    pool = DBA._make_pool(n_workers, use_threads)
+    try:
+        updated_center, inertia = DBA._DBA_update(center, series, cost_mat, path_mat, delta_mat, pool=pool)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    np.testing.assert_allclose(updated_center, expected, rtol=1e-12)
+    assert inertia == pytest.approx(expected_inertia, rel=1e-12)
+
+
+@pytest.mark.parametrize("n_workers, use_threads", [(1, True), (2, True), (2, False)])
+def test_performDBA(n_workers, use_threads):
+    # Test that the barycenter is that of the original loops, serially and in parallel:
+    series = random_series(4)
+    expected = reference_performDBA(series, n_iterations=5)
+    center = DBA.performDBA(series, n_iterations=5, n_workers=n_workers, use_threads=use_threads)
+    np.testing.assert_allclose(center, expected, rtol=1e-12)
+
+
+def inertia_of(center, series):
+    cost_mat, _, delta_mat = matrices(series + [center])
+    return sum(reference_squared_DTW(center, s, cost_mat, delta_mat) for s in series)
+
+
+@pytest.mark.parametrize("n_workers, use_threads", [(1, True), (2, True), (2, False)])
+def test_performDBA_random_state(n_workers, use_threads):
+    # Test that the same random state gives the same barycenter (the random restarts included):
+    series = random_series(5, n_series=60) # (more than 50 series, so the medoid candidates are drawn at random)
+    centers = [DBA.performDBA(series, n_iterations=3, n_workers=n_workers, use_threads=use_threads,
+                              random_state=7, n_restarts=3) for _ in range(2)]
+    np.testing.assert_array_equal(centers[0], centers[1])
+
+
+def test_performDBA_tol():
+    # Test that a large tol stops after the first iteration, and that the center with the lower inertia is returned:
+    series = random_series(6)
+    center, history = DBA.performDBA(series, n_iterations=10, tol=1e9, return_history=True)
+    run = history['runs'][0]
+    assert len(run['inertia']) == 2
+    assert run['best_inertia'] == min(run['inertia'])
+    assert inertia_of(center, series) == pytest.approx(run['best_inertia'], rel=1e-12)
+
+
+@pytest.mark.parametrize("n_workers, use_threads", [(1, True), (2, True), (2, False)])
+def test_performDBA_restarts(n_workers, use_threads):
+    # Test that with several restarts the run with the lowest inertia is returned:
+    series = random_series(7)
+    center, history = DBA.performDBA(series, n_iterations=4, n_workers=n_workers, use_threads=use_threads,
+                                     random_state=0, n_restarts=4, return_history=True)
+    best_inertia = [run['best_inertia'] for run in history['runs']]
+    assert len(best_inertia) == 4
+    assert history['best_run'] == int(np.argmin(best_inertia))
+    assert inertia_of(center, series) == pytest.approx(min(best_inertia), rel=1e-12)
+
+
+@pytest.mark.parametrize("tol, n_restarts", [(None, 1), (1e-3, 1), (None, 3)])
+def test_performDBA_history(tol, n_restarts):
+    # Test that every iteration of every run has its inertia and its time:
+    series = random_series(8)
+    _, history = DBA.performDBA(series, n_iterations=5, tol=tol, random_state=0, n_restarts=n_restarts,
+                                return_history=True)
+    assert len(history['runs']) == n_restarts
+    for run in history['runs']:
+        assert 0 < len(run['inertia']) == len(run['time']) <= 5 + 1
+        assert all(t >= 0 for t in run['time'])
+        assert run['best_inertia'] == min(run['inertia'])
@@ -0,0 +1,42 @@
+# Test the cleaning of the temperature recordings (full and partial duplicates, missing data and "Bin" data)
+
+import numpy as np
+import pandas as pd
+
+from dat_clean import dat_clean
+
+
+def write_recordings(folder, name, rows):
+    pd.DataFrame(rows, columns=["User ID", "Start Time", "Data", "A"]).to_csv(folder / name, index=False)
+
+
+def test_dat_clean(tmp_path):
+    write_recordings(tmp_path, "alluserrecordings0.csv", [
+        ["u1", "2020-01-01 22:00:00", "QUJD", 1],                   # kept
+        ["u1", "2020-01-01 22:00:00", "QUJD", 1],                   # full duplicate
+        ["u2", "2020-01-02 22:00:00", "QUJE", np.nan],              # partial duplicate, less complete
+        ["u3", "2020-01-03 22:00:00", np.nan, 1],                   # no data
+        ["u4", "2020-01-04 22:00:00", "Bin1234567QUJF", 1],         # kept, "Bin" data
+    ])
+    write_recordings(tmp_path, "alluserrecordings1.csv", [
+        ["u2", "2020-01-02 22:00:00", "QUJG", 2],                   # kept, the most complete
+        ["u1", "2020-01-01 22:00:00", "QUJD", 1],                   # full duplicate (of another dataset)
+        ["u5", "2020-01-05 22:00:00", "QUJH", np.nan],              # kept, the first of the equally complete rows
+        ["u5", "2020-01-05 22:00:00", "QUJI", np.nan],              # partial duplicate, as complete
+    ])
+    write_recordings(tmp_path, "alluserrecordings2.csv", [
+        ["u3", "2020-01-03 22:00:00", "QUJJ", np.nan],              # kept (the row without data was dropped)
+    ])
+    output = tmp_path / "data_cleaned.csv"
+    
+    counters = dat_clean(str(tmp_path), str(output), workers=2)
+    assert counters == {"recordings": 10, "full_duplicates": 2, "null_data": 1, "partial_duplicates": 2, 
+                        "bin_data": 1, "cleaned": 5}
+    
+    # the kept rows in the order of the datasets and of their rows, with a new index:
+    cleaned = pd.read_csv(output, index_col=0)
+    assert cleaned.index.tolist() == [0, 1, 2, 3, 4]
+    assert cleaned["prime"].tolist() == ["u1_2020-01-01 22:00:00", "u4_2020-01-04 22:00:00", "u2_2020-01-02 22:00:00", 
+                                         "u5_2020-01-05 22:00:00", "u3_2020-01-03 22:00:00"]
+    assert cleaned["Data"].tolist() == ["QUJD", "QUJF", "QUJG", "QUJH", "QUJJ"]
+    assert cleaned["A"].fillna(-1).tolist() == [1, 1, 2, -1, -1]
@@ -0,0 +1,59 @@
+# Test the streaming merge of the decrypted files (decrypt_merge_2.py)
+
+import os
+import pandas as pd
+import pytest
+
+import tools.storage as storage
+from decrypt_merge_2 import decrypt_merge
+
+
+def write_decrypted(path, rows):
+    # as decrypt.js writes them: the temperatures of "Data" spread over the columns before "prime"
+    with open(path, "w") as f:
+        f.write("c0,c1,c2,c3,c4,c5,Data,prime\n")
+        for values, data, prime in rows:
+            f.write(",".join(values + data + [prime]) + "\n")
+
+
+def decrypted_folder(folder):
+    row = ["0", "1", "2", "3", "4", "5"]
+    write_decrypted(folder / "decrypted1.csv", [(row, ["36000", "36100"], "p1"), (row, ["36200"], "p2")])
+    write_decrypted(folder / "decrypted2.csv", [(row, ["36300"], "p3"), (row, ["36400", "36500"], "p1")]) # p1 already merged
+    write_decrypted(folder / "decrypted3.csv", [(row, ["36600"], "p4"), (row, ["36700"], "p4")])          # p4 twice
+    return [str(folder / name) for name in ["decrypted1.csv", "decrypted2.csv", "decrypted3.csv"]]
+
+
+@pytest.mark.parametrize("extension", ["csv", "parquet"])
+def test_decrypt_merge(tmp_path, extension):
+    # Test that the first record of every prime is merged across the files, and that the files are then removed:
+    folder = tmp_path / "decrypted"
+    folder.mkdir()
+    decrypted_folder(folder)
+    output = str(tmp_path / ("merged." + extension))
+    decrypt_merge(str(folder), output)
+    
+    assert os.listdir(folder) == []
+    assert os.path.exists(output) and not os.path.exists(output + ".part")
+    merged = storage.read_frame(output, index_col=0) if extension == "csv" else storage.read_frame(output)
+    assert sorted(merged["prime"]) == ["p1", "p2", "p3", "p4"]
+    data = dict(zip(merged["prime"], [storage.float_values(x.replace("'", "")) if isinstance(x, str) else storage.float_values(x) 
+                                      for x in merged["Data"]]))
+    assert data == {"p1": [36000.0, 36100.0], "p2": [36200.0], "p3": [36300.0], "p4": [36600.0]}
+    assert merged.index.tolist() == list(range(4))
+
+
+def test_decrypt_merge_error(tmp_path):
+    # Test that a failed merge leaves neither the output nor the temporary file, and keeps all the decrypted files:
+    folder = tmp_path / "decrypted"
+    folder.mkdir()
+    files = decrypted_folder(folder)
+    with open(folder / "decrypted4.csv", "w") as f: # a broken file
+        f.write("a,b\n1,2,3\n")
+    output = str(tmp_path / "merged.parquet")
+    with pytest.raises(ValueError):
+        decrypt_merge(str(folder), output)
+    
+    assert not os.path.exists(output) and not os.path.exists(output + ".part")
+    assert sorted(os.listdir(folder)) == ["decrypted1.csv", "decrypted2.csv", "decrypted3.csv", "decrypted4.csv"]
+    assert all(os.path.exists(f) for f in files)
@@ -0,0 +1,27 @@
+# Test the PCOS labels of the questionnaire answers
+
+import numpy as np
+import pandas as pd
+
+from tools.tools import PCOS_DIAGNOSIS, INFERTILITY_QUESTION, pcos_labels, fill_missing_pcos
+
+
+def test_pcos_labels():
+    # Test the labels of every rule, in their order of precedence:
+    df = pd.DataFrame({
+        "PCOS":               [PCOS_DIAGNOSIS, PCOS_DIAGNOSIS, "Endometriosis", np.nan, np.nan, np.nan, np.nan],
+        INFERTILITY_QUESTION: [np.nan,         "No",           "Yes",           "No",   np.nan, np.nan, "Prefer not to answer"],
+        "Unnamed: 676":       [np.nan,         np.nan,         np.nan,          "Yes",  "No",   np.nan, np.nan],
+    })
+    assert pcos_labels(df).tolist() == [1, 1, 0, 0, 0, 2, 2]
+
+
+def test_fill_missing_pcos():
+    # Test that only the missing labels are coded as 3 and that the labels keep their type:
+    pcos = pd.Series([1, np.nan, 0, 2, None], dtype=object, name="PCOS")
+    filled = fill_missing_pcos(pcos)
+    assert filled.tolist() == [1, 3, 0, 2, 3]
+    assert filled.dtype == object and filled.name == "PCOS"
+    
+    filled = fill_missing_pcos(pd.Series([1.0, np.nan]))
+    assert filled.tolist() == [1.0, 3.0] and filled.dtype == np.float64
@@ -0,0 +1,80 @@
+# Test the batch writer of the datasets (FrameWriter)
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+import tools.storage as storage
+
+
+def batches():
+    return [
+        pd.DataFrame({"prime": ["a", "b"], "Mean_Temp": [36000, 36500], "Data": [[1.0, 2.0], [3.0]]}),
+        pd.DataFrame({"Data": [[4.0]], "prime": ["c"], "Mean_Temp": [37000]}), # the columns in another order
+        pd.DataFrame({"prime": ["d", "e"], "Mean_Temp": [35500, 36100], "Data": [None, [5.0, 6.0]]}),
+    ]
+
+
+@pytest.mark.parametrize("extension", ["csv", "parquet"])
+def test_frame_writer(tmp_path, extension):
+    # Test that the batches are written as one dataset, numbered across the batches, once the writer is closed:
+    path = str(tmp_path / ("merged." + extension))
+    with storage.FrameWriter(path) as writer:
+        for batch in batches():
+            writer.write(batch)
+            assert os.path.exists(path + ".part") and not os.path.exists(path)
+    assert os.path.exists(path) and not os.path.exists(path + ".part")
+    
+    expected = pd.concat(batches(), ignore_index=True)[["prime", "Mean_Temp", "Data"]]
+    merged = storage.read_frame(path, index_col=0) if extension == "csv" else storage.read_frame(path)
+    assert merged.index.tolist() == [0, 1, 2, 3, 4]
+    assert merged.columns.tolist() == expected.columns.tolist()
+    assert merged["prime"].tolist() == expected["prime"].tolist()
+    assert merged["Mean_Temp"].tolist() == expected["Mean_Temp"].tolist()
+    data = [[] if x is None or (not storage.is_list(x) and pd.isnull(x)) else storage.float_values(x) for x in merged["Data"]]
+    assert data == [[1.0, 2.0], [3.0], [4.0], [], [5.0, 6.0]]
+
+
+@pytest.mark.parametrize("extension", ["csv", "parquet"])
+def test_frame_writer_error(tmp_path, extension):
+    # Test that an error leaves neither the output nor the temporary file, and that an existing output is kept:
+    path = str(tmp_path / ("merged." + extension))
+    with pytest.raises(RuntimeError):
+        with storage.FrameWriter(path) as writer:
+            writer.write(batches()[0])
+            raise RuntimeError("interrupted")
+    assert not os.path.exists(path) and not os.path.exists(path + ".part")
+    
+    storage.write_frame(batches()[0], path)
+    with pytest.raises(ValueError, match="columns"): # a batch with other columns
+        with storage.FrameWriter(path) as writer:
+            writer.write(batches()[0])
+            writer.write(batches()[1].assign(Other=1))
+    assert os.path.exists(path) and not os.path.exists(path + ".part")
+    assert len(storage.read_frame(path)) == 2
+
+
+def test_frame_writer_types(tmp_path):
+    # Test that the later batches are cast to the types of the first one in Parquet, or fail loudly:
+    path = str(tmp_path / "merged.parquet")
+    with storage.FrameWriter(path) as writer:
+        writer.write(pd.DataFrame({"a": [1, 2], "b": ["x", None]}))
+        writer.write(pd.DataFrame({"a": [3], "b": [np.nan]})) # a column of missing values
+    assert storage.read_frame(path)["b"].tolist() == ["x", None, None]
+    
+    with pytest.raises(ValueError, match="column b"):
+        with storage.FrameWriter(path) as writer:
+            writer.write(pd.DataFrame({"a": [1.0], "b": [np.nan]}))
+            writer.write(pd.DataFrame({"a": [2.0], "b": ["x"]}))
+    assert not os.path.exists(path + ".part")
+
+
+@pytest.mark.parametrize("extension", ["csv", "parquet"])
+def test_frame_writer_empty(tmp_path, extension):
+    # Test that a writer without batches writes an empty dataset:
+    path = str(tmp_path / ("merged." + extension))
+    with storage.FrameWriter(path):
+        pass
+    assert os.path.exists(path) and not os.path.exists(path + ".part")
+    assert len(storage.read_frame(path)) == 0
@@ -0,0 +1,89 @@
+import os
+import numpy as np
+import pandas as pd
+
+#Columnar store of the daily temperatures of all the cycles (built from the sel_crt_2 output in a single pass).
+#The temperatures of every cycle are contiguous in one float32 array (the readings are integers between
+#35000 and 40000, which float32 holds exactly), along with the day of every reading counted from the first
+#day of the cycle. A cycle is then two array slices instead of a DataFrame from groupby.get_group.
+class CycleTemps:
+    def __init__(self, users, cycles, first_dates, offsets, days, temps):
+        self.users = users                #user ID of every cycle
+        self.cycles = cycles              #cycle ID of every cycle
+        self.first_dates = first_dates    #first date of every cycle (datetime64[D])
+        self.offsets = offsets            #the readings of cycle k are offsets[k]:offsets[k+1]
+        self.days = days                  #day of every reading (from the first day of its cycle)
+        self.temps = temps                #temperature of every reading (float32)
+        self.index = {key: k for k, key in enumerate(zip(users, cycles))}
+
+    @classmethod
+    def from_frame(cls, temps_df):
+        #temps_df: temperatures as returned by Frames.read_temp (sorted by date and time).
+        #As in actual_day, the first reading of every date is kept.
+        user_codes, users = pd.factorize(temps_df["User ID"])
+        cycle_codes, cycles = pd.factorize(temps_df["Cycle ID"])
+        dates = pd.to_datetime(temps_df["Date"]).values.astype("datetime64[D]")
+        order = np.lexsort((dates, cycle_codes, user_codes)) #stable, so the earlier readings of a date come first
+        user_codes, cycle_codes, dates = user_codes[order], cycle_codes[order], dates[order]
+        temps = temps_df["Mean_Temp"].to_numpy(dtype=np.float32)[order]
+
+        new_cycle = np.ones(len(order), dtype=bool)
+        new_cycle[1:] = (user_codes[1:] != user_codes[:-1]) | (cycle_codes[1:] != cycle_codes[:-1])
+        keep = new_cycle.copy()
+        keep[1:] |= dates[1:] != dates[:-1] #drop duplicate dates
+        new_cycle, user_codes, cycle_codes, dates, temps = new_cycle[keep], user_codes[keep], cycle_codes[keep], dates[keep], temps[keep]
+
+        starts = np.flatnonzero(new_cycle)
+        offsets = np.append(starts, len(dates)).astype(np.int64)
+        first_dates = dates[starts]
+        days = (dates - np.repeat(first_dates, np.diff(offsets))).astype(np.int32)
+        return cls(np.asarray(users)[user_codes[starts]], np.asarray(cycles)[cycle_codes[starts]],
+                   first_dates, offsets, days, temps)
+
+    def save(self, path):
+        np.savez(path, users=self.users, cycles=self.cycles, first_dates=self.first_dates,
+                 offsets=self.offsets, days=self.days, temps=self.temps)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=True) as f:
+            return cls(f["users"], f["cycles"], f["first_dates"], f["offsets"], f["days"], f["temps"])
+
+    #One .npy file per array, so that the worker processes of nadirs_and_peaks can memory-map the
+    #readings instead of receiving a copy of them (the user and cycle IDs are objects and are loaded)
+    def save_arrays(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in ("users", "cycles", "first_dates", "offsets", "days", "temps"):
+            np.save(os.path.join(directory, name + ".npy"), getattr(self, name))
+
+    @classmethod
+    def open_arrays(cls, directory, mmap_mode="r"):
+        ids = [np.load(os.path.join(directory, name + ".npy"), allow_pickle=True) for name in ("users", "cycles")]
+        arrays = [np.load(os.path.join(directory, name + ".npy"), mmap_mode=mmap_mode)
+                  for name in ("first_dates", "offsets", "days", "temps")]
+        return cls(*ids, *arrays)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def cycle(self, user, cycle):
+        #days and temperatures of the readings of a cycle (views, not copies)
+        k = self.index[(user, cycle)]
+        return self.days[self.offsets[k]:self.offsets[k+1]], self.temps[self.offsets[k]:self.offsets[k+1]]
+
+    def daily_frame(self, user, cycle):
+        #one row for every day from the first to the last reading of the cycle, with the missing days marked
+        #(the same columns that actual_day uses from its merge of the readings with the date range)
+        days, temps = self.cycle(user, cycle)
+        n_days = days[-1] + 1
+        mean_temp = np.full(n_days, np.nan)
+        mean_temp[days] = temps
+        missing_day = np.ones(n_days, dtype=bool)
+        missing_day[days] = False
+        k = self.index[(user, cycle)]
+        return pd.DataFrame({"key_0": pd.to_datetime(self.first_dates[k] + np.arange(n_days)),
+                             "User ID": user, "Cycle ID": cycle,
+                             "Mean_Temp": mean_temp, "Missing_Day": missing_day})
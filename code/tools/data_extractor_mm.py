@@ -38,19 +38,7 @@ def actual_day(group_temp, user, cycle):
     df_reindexed = pd.DataFrame(cycle_temp.reindex(pd.date_range(start, end)).isnull().all(1), columns=["Missing_Day"])
     temperature_vals = pd.merge(cycle_temp,  df_reindexed, left_on=cycle_temp.index, right_on= df_reindexed.index, how = "outer", sort = True)
 
-    temperature_vals["Missing_length"] = 0
-
-    for i in (temperature_vals[temperature_vals["Missing_Day"] == True].index):
-        last_day_before_miss = temperature_vals.iloc[0:i][temperature_vals.iloc[0:i]["Missing_Day"] == False].tail(1).index
-        first_day_after_miss = temperature_vals.iloc[i:][temperature_vals.iloc[i:]["Missing_Day"] == False].head(1).index
-
-        temperature_vals.loc[i, "Missing_length"] = first_day_after_miss - last_day_before_miss - 1
-
-    try:    
-        missed = temperature_vals[temperature_vals["Missing_length"] > 10].head(1).index.values[0] #if there are more than 10 missing days
-        temperature_vals = temperature_vals.iloc[0:missed] #drop all recordings after 10 missing days
-    except IndexError:
-        temperature_vals = temperature_vals #otherwise keep all temperatures with the missing dates
+    temperature_vals = tools.drop_after_missing_gap(temperature_vals, max_gap=10) #drop all recordings after more than 10 missing days
 
     temperature_vals["Mean_Temp"] = temperature_vals["Mean_Temp"].interpolate(method = "linear", limit_direction = "forward")
     temperature_vals["Cycle ID"] = temperature_vals["Cycle ID"].fillna(method = "pad") #fill the missing cycle IDs
@@ -60,7 +48,8 @@ def actual_day(group_temp, user, cycle):
 
 
 def slope_nadir_peak(user, user_cycles, cycle, temp_vals, model_cycle):
-    model_cycle = tools.load_model_cycle(model_cycle)['model']#the model cycle 
+    model = tools.model_cycle_anchors(model_cycle, key='model')#the model cycle and its anchors (the file is loaded once per process)
+    model_cycle = list(model.values)#the model cycle 
     keep = user_cycles[user_cycles.index == cycle]
     date_dur = keep["Data_Dur"].values[0]#get the data duration of the cycle
     offset = int(keep["Offset"])#get the offset of the cycle
@@ -44,19 +44,7 @@ def actual_day(group_temp, user, cycle):
     df_reindexed = pd.DataFrame(cycle_temp.reindex(pd.date_range(start, end)).isnull().all(1), columns=["Missing_Day"])
     temperature_vals = pd.merge(cycle_temp,  df_reindexed, left_on=cycle_temp.index, right_on= df_reindexed.index, how = "outer", sort = True)
 
-    temperature_vals["Missing_length"] = 0
-
-    for i in (temperature_vals[temperature_vals["Missing_Day"] == True].index):
-        last_day_before_miss = temperature_vals.iloc[0:i][temperature_vals.iloc[0:i]["Missing_Day"] == False].tail(1).index
-        first_day_after_miss = temperature_vals.iloc[i:][temperature_vals.iloc[i:]["Missing_Day"] == False].head(1).index
-
-        temperature_vals.loc[i, "Missing_length"] = first_day_after_miss - last_day_before_miss - 1
-
-    try:    
-        missed = temperature_vals[temperature_vals["Missing_length"] > 10].head(1).index.values[0] #more than 10 missing days
-        temperature_vals = temperature_vals.iloc[0:missed] #drop all recordings after 10-day miss
-    except IndexError:
-        temperature_vals = temperature_vals #otherwise keep all temperatures with the missing dates
+    temperature_vals = tools.drop_after_missing_gap(temperature_vals, max_gap=10) #drop all recordings after more than 10 missing days
 
     temperature_vals["Mean_Temp"] = temperature_vals["Mean_Temp"].interpolate(method = "linear", limit_direction = "forward")
     temperature_vals["Cycle ID"] = temperature_vals["Cycle ID"].ffill()#fill the missing cycle IDs
@@ -67,8 +55,21 @@ def actual_day(group_temp, user, cycle):
     return temperature_vals
 
 
+def actual_day_columnar(cycle_temps, user, cycle):
+    #Same as actual_day, but slicing the cycle from a columnar store (tools.cycle_temps.CycleTemps)
+    #instead of grouping, sorting and reindexing a DataFrame
+    temperature_vals = cycle_temps.daily_frame(user, cycle)
+
+    temperature_vals = tools.drop_after_missing_gap(temperature_vals, max_gap=10) #drop all recordings after more than 10 missing days
+
+    temperature_vals["Mean_Temp"] = temperature_vals["Mean_Temp"].interpolate(method = "linear", limit_direction = "forward")
+
+    return temperature_vals
+
+
 def slope_nadir_peak(user, user_cycles, cycle, temp_vals, model_cycle):
-    model_cycle = tools.load_model_cycle(model_cycle)['model_cycle']#the model cycle 
+    model = tools.model_cycle_anchors(model_cycle, key='model_cycle')#the model cycle and its anchors (the file is loaded once per process)
+    model_cycle = list(model.values)#the model cycle 
     keep = user_cycles[user_cycles.index == cycle]
     date_dur = keep["Data_Dur"].values[0]#get the data duration of the cycle
     offset = int(keep["Offset"].iloc[0])#get the offset of the cycle
@@ -229,7 +230,7 @@ def slope_nadir_peak(user, user_cycles, cycle, temp_vals, model_cycle):
     #Computing nadir and peak using DTW and standardized temperature values
     #Standard_nadir_day, Standard_nadir_temp, Standard_nadir_temp_actual, Standard_peak_day, Standard_peak_temp, Standard_peak_temp_actual = tools.get_nadirs_and_peaks(Standard_smooth_temps, Standard_path, smooth_temps, model_cycle)
     Standard_nadir_day, Standard_nadir_temp, Standard_nadir_temp_actual, Standard_peak_day, Standard_peak_temp, Standard_peak_temp_actual = tools.get_nadirs_and_peaks(
-        Standard_smooth_temps, Standard_path, Expanded_smooth_temps_not_null, model_cycle, cycle
+        Standard_smooth_temps, Standard_path, Expanded_smooth_temps_not_null, model, cycle
         )
     #Standard_smooth_temps
     #Standard_path
@@ -257,16 +258,16 @@ def slope_nadir_peak(user, user_cycles, cycle, temp_vals, model_cycle):
     ending_warps = len([x for x in Standard_path if x[1] == cycle_max_pos]) #The ending warps
 
     if (nadir_valid == False) & (beginning_warps > 1): #cycles with no negative slope before peaks and many-to-one warps at the beginning
-        Expanded_nadir_day = tools.extrapolate_nadir_day(Standard_path, model_cycle, Expanded_smooth_temps, cycle_least_pos)
-        Standard_nadir_temp, Standard_nadir_temp_actual = tools.extrapolate_nadir_temp(Standard_path, model_cycle, Standard_smooth_temps, Expanded_smooth_temps_not_null, Standard_peak_temp, Standard_peak_temp_actual, cycle_least_pos)
+        Expanded_nadir_day = tools.extrapolate_nadir_day(Standard_path, model, Expanded_smooth_temps, cycle_least_pos)
+        Standard_nadir_temp, Standard_nadir_temp_actual = tools.extrapolate_nadir_temp(Standard_path, model, Standard_smooth_temps, Expanded_smooth_temps_not_null, Standard_peak_temp, Standard_peak_temp_actual, cycle_least_pos)
     else:
         Expanded_nadir_day = Expanded_smooth_temps_offset + Standard_nadir_day #added offset for those without many-to-one warps at the nadir
         Standard_nadir_temp = Standard_nadir_temp
         Standard_nadir_temp_actual = Standard_nadir_temp_actual
 
     if (peak_valid == False) & (ending_warps > 1): #cycles with no negative slope before peaks and many-to-one warps at the beginning
-        Expanded_peak_day = tools.extrapolate_peak_day(Standard_path, model_cycle, Expanded_smooth_temps, cycle_max_pos)
-        Standard_peak_temp, Standard_peak_temp_actual = tools.extrapolate_peak_temp(Standard_path, model_cycle, Standard_smooth_temps, Expanded_smooth_temps_not_null, Standard_nadir_temp, Standard_nadir_temp_actual, cycle_max_pos)
+        Expanded_peak_day = tools.extrapolate_peak_day(Standard_path, model, Expanded_smooth_temps, cycle_max_pos)
+        Standard_peak_temp, Standard_peak_temp_actual = tools.extrapolate_peak_temp(Standard_path, model, Standard_smooth_temps, Expanded_smooth_temps_not_null, Standard_nadir_temp, Standard_nadir_temp_actual, cycle_max_pos)
     else:
         Expanded_peak_day = Expanded_smooth_temps_offset + Standard_peak_day #added offset for those without many-to-one warps at the peak
         Standard_peak_temp = Standard_peak_temp
@@ -0,0 +1,64 @@
+import os
+import pickle
+import hashlib
+import numpy as np
+
+#Cache of the cycle level features of nadirs_and_peaks, so that a run only extracts the features of the new
+#and changed cycles. Every cycle is keyed by its IDs, the hash of its temperatures and of its row in the cycles
+#dataset, the hash of the model cycle and the version of the extractors: a cycle with new recordings, a new
+#model cycle or a change to the extractors (with a new version number) gives a new key.
+#The features of a cycle are stored as returned by the extractors (None for the cycles that are too short).
+
+def array_hash(*arrays):
+    h = hashlib.sha1()
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(str((a.dtype.str, a.shape)).encode())
+        h.update(a.tobytes())
+    return h.hexdigest()
+
+def model_cycle_hash(model):
+    #model: a tools.ModelCycle
+    return array_hash(np.asarray(model.values, dtype=np.float64))
+
+def cycle_key(user, cycle, cycle_temps, cycle_row, model_hash, version):
+    #cycle_temps: a tools.cycle_temps.CycleTemps; cycle_row: the row of the cycle in the grouped cycles dataset
+    if (user, cycle) in cycle_temps:
+        days, temps = cycle_temps.cycle(user, cycle)
+        first_date = cycle_temps.first_dates[cycle_temps.index[(user, cycle)]]
+        temps_hash = array_hash(np.asarray(first_date), days, temps)
+    else:
+        temps_hash = None
+    return (user, cycle, temps_hash, hashlib.sha1(repr(tuple(cycle_row)).encode()).hexdigest(), model_hash, version)
+
+class FeatureCache:
+    def __init__(self, path):
+        self.path = path
+        self.features = {}
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                self.features = pickle.load(f)
+        self.used = set() #the keys of this run
+
+    def __len__(self):
+        return len(self.features)
+
+    def __contains__(self, key):
+        return key in self.features
+
+    def __getitem__(self, key):
+        self.used.add(key)
+        return self.features[key]
+
+    def __setitem__(self, key, features):
+        self.used.add(key)
+        self.features[key] = features
+
+    def save(self):
+        #only the cycles of this run are kept (the others were removed or have changed);
+        #written to a temporary file first, so that an interrupted run does not leave a broken cache
+        features = {key: self.features[key] for key in self.used}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(features, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
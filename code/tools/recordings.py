@@ -0,0 +1,28 @@
+import base64
+import numpy as np
+
+#Decoding of the nightly recordings (the "Data" column of the temperature recordings) as decrypt.js does it, on the
+#bytes instead of hex strings: every record is base64, and every two bytes are a little-endian 16-bit word whose
+#bits 10-15 are the thousands and bits 0-9 the units of a temperature (byteToRecordingTemp). The temperatures are
+#at most 63 * 1000 + 1023, so they are stored as uint16.
+
+def recording_bytes(record):
+    #whitespace is ignored and the padding is optional, as with atob; a missing record (an empty string in the CSV) has no bytes
+    if not isinstance(record, str):
+        return b""
+    record = "".join(record.split())
+    return base64.b64decode(record + "=" * (-len(record) % 4))
+
+def recordings_to_temperatures(records):
+    #the temperatures of all the records in one array, with the offsets of the records
+    #(the temperatures of the record k are temperatures[offsets[k]:offsets[k+1]])
+    raw = [recording_bytes(record) for record in records]
+    n_bytes = np.array([len(r) for r in raw], dtype=np.int64)
+    #a record with an odd number of bytes: the last byte is the low byte of a word with a zero high byte,
+    #as byteToRecordingTemp gives with an undefined second byte
+    raw = [r + b"\0" if len(r) % 2 == 1 else r for r in raw]
+    offsets = np.zeros(len(raw) + 1, dtype=np.int64)
+    np.cumsum((n_bytes + 1) // 2, out=offsets[1:])
+    words = np.frombuffer(b"".join(raw), dtype="<u2")
+    temperatures = ((words >> 10) & 0x003f) * 1000 + (words & 0x03ff)
+    return offsets, temperatures.astype(np.uint16)
@@ -0,0 +1,252 @@
+import os
+import json
+import time
+import itertools
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.compute as pc
+from loguru import logger
+
+#Reading and writing the datasets of the pipeline (Frames and the writers of the rules of the Snakefile).
+#The format is given by the extension of the file: ".csv" for CSV and Parquet otherwise (".parquet" in the variables files).
+#In the Parquet files the columns are typed: the lists (e.g. "Data", "Smooth_Temp") are list columns instead of their
+#repr strings, the strings (the IDs) are dictionary-encoded, the dates keep their types and the temperatures are stored
+#as uint16 (the readings are between 35000 and 40000, beyond int16). The pipeline groups by the IDs, so they are read as
+#strings, not categoricals (grouping by categoricals gives every combination of the categories).
+
+NARROW_INT_COLUMNS = {"Mean_Temp": np.uint16} #stored narrow, read as int64 so that the arithmetic does not change
+
+def is_csv(path):
+    return str(path).lower().endswith(".csv")
+
+def is_list(x):
+    return isinstance(x, (list, tuple, np.ndarray))
+
+def typed_column(values):
+    #the column as it is stored in a Parquet file
+    if values.name in NARROW_INT_COLUMNS and pd.api.types.is_integer_dtype(values.dtype) and len(values) > 0:
+        info = np.iinfo(NARROW_INT_COLUMNS[values.name])
+        if values.min() >= info.min and values.max() <= info.max:
+            return values.astype(NARROW_INT_COLUMNS[values.name])
+    if values.dtype != object:
+        return values
+    try:
+        pa.array(values, from_pandas=True)
+        return values
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    missing = values.map(lambda x: not is_list(x) and pd.isnull(x))
+    if values[~missing].map(is_list).all(): #lists, with NaN for the missing lists
+        return values.where(~missing, None)
+    #mixed types (e.g. numbers and strings in the questionnaire answers): strings, as they are read from a CSV
+    return values.map(str).where(~missing, None)
+
+def write_frame(df, path, index=True):
+    if is_csv(path):
+        df.to_csv(path, index=index)
+        return
+    typed_columns(df).to_parquet(path, engine="pyarrow", index=None if index else False)
+
+def typed_columns(df):
+    typed = pd.DataFrame({column: typed_column(df[column]) for column in df.columns}, index=df.index)
+    typed.columns = [str(column) for column in df.columns]
+    return typed
+
+#A dataset written in batches (e.g. one batch per input file), so that the whole dataset is not held in memory.
+#The batches go to a temporary file next to the output, which replaces the output when the writer is closed
+#(the dataset is then committed); after an error the temporary file is removed and the output is left as it was.
+#The rows are numbered across the batches, as with pd.concat(..., ignore_index=True). All the batches must have the
+#same columns, which are written in the order of the first batch (and cast to its types in Parquet); a batch
+#with other columns, or with a column that cannot be cast, is an error.
+class FrameWriter:
+    def __init__(self, path, index=True):
+        self.path = path
+        self.index = index
+        self.tmp_path = str(path) + ".part"
+        self.columns = None
+        self.n_rows = 0
+        self.parquet_writer = None
+        self.schema = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, df):
+        first = self.columns is None
+        if first:
+            self.columns = list(df.columns)
+        elif set(df.columns) != set(self.columns):
+            raise ValueError(f"The columns of a batch of {self.path} differ from those of the first batch: "
+                             f"{sorted(map(str, set(df.columns) ^ set(self.columns)))}")
+        df = df[self.columns].set_axis(pd.RangeIndex(self.n_rows, self.n_rows + len(df)), axis=0)
+        if is_csv(self.path):
+            df.to_csv(self.tmp_path, index=self.index, mode="w" if first else "a", header=first)
+        else:
+            #the RangeIndex is not stored (as with write_frame), the rows are numbered again when read
+            table = pa.Table.from_pandas(typed_columns(df), preserve_index=False)
+            if self.parquet_writer is None:
+                self.schema = table.schema
+                self.parquet_writer = pq.ParquetWriter(self.tmp_path, self.schema)
+            else:
+                table = self.cast(table)
+            self.parquet_writer.write_table(table)
+        self.n_rows += len(df)
+
+    def cast(self, table):
+        #a batch as the types of the first batch (e.g. a column of missing values, inferred as floats or nulls)
+        columns = []
+        for field, column in zip(self.schema, table.columns):
+            try:
+                columns.append(pc.cast(column, field.type))
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                raise ValueError(f"The column {field.name} of a batch of {self.path} is {column.type} "
+                                 f"and cannot be cast to {field.type} (its type in the first batch)") from e
+        return pa.Table.from_arrays(columns, schema=self.schema)
+
+    def close(self):
+        if self.columns is None: #no batches: an empty dataset
+            self.write(pd.DataFrame())
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+def typed_frame(df):
+    #the DataFrame as it was written (the narrow integers back to int64)
+    for column, dtype in NARROW_INT_COLUMNS.items():
+        if column in df.columns and df[column].dtype == dtype:
+            df[column] = df[column].astype(np.int64)
+    return df
+
+def requested_frame(df, columns):
+    #the requested columns that were stored as the index are columns, as with pd.read_csv
+    if columns is not None:
+        levels = [name for name in df.index.names if name in columns]
+        if len(levels) > 0:
+            df = df.reset_index(levels)
+    return typed_frame(df)
+
+def read_frame(path, columns=None, index_col=None, **csv_kwargs):
+    #columns: the columns to read (only those are read from a Parquet file); index_col: as in pd.read_csv
+    if is_csv(path):
+        return pd.read_csv(path, usecols=columns, index_col=index_col, **csv_kwargs)
+    df = requested_frame(pd.read_parquet(path, engine="pyarrow", columns=parquet_columns(path, columns, index_col)), columns)
+    if index_col is not None and index_col not in df.index.names:
+        df = df.set_index(index_col)
+    return df
+
+def read_frame_chunks(path, columns=None, chunksize=50000, **csv_kwargs):
+    #the dataset in chunks of (at most) chunksize rows, as pd.read_csv with a chunksize
+    if is_csv(path):
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize, **csv_kwargs)
+        return
+    parquet_file = pq.ParquetFile(path)
+    schema = parquet_file.schema_arrow
+    stored_columns = parquet_columns(path, columns)
+    if stored_columns is not None:
+        schema = pa.schema([schema.field(column) for column in stored_columns], metadata=schema.metadata)
+    for batch in parquet_file.iter_batches(batch_size=chunksize, columns=stored_columns):
+        yield requested_frame(pa.Table.from_batches([batch], schema=schema).to_pandas(), columns)
+
+#The exports come in shards (the alluserrecordings, allusercycles and alluserevents files), which are read
+#concurrently in threads (the CSV parser releases the GIL). The shards are returned in order, with at most
+#`workers` shards read ahead so that the memory stays bounded, and the throughput of every shard is logged.
+SHARD_WORKERS = 4 #not the number of cores: every worker holds a whole shard
+
+def map_shards(paths, read, workers=SHARD_WORKERS):
+    #read(path) for every shard
+
+    def timed_read(path):
+        start = time.perf_counter()
+        result = read(path)
+        return result, time.perf_counter() - start
+
+    paths = iter(paths)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = collections.deque((path, executor.submit(timed_read, path)) for path in itertools.islice(paths, workers))
+        while len(pending) > 0:
+            path, future = pending.popleft()
+            result, seconds = future.result()
+            for next_path in itertools.islice(paths, 1):
+                pending.append((next_path, executor.submit(timed_read, next_path)))
+            seconds = max(seconds, 1e-9)
+            mb = os.path.getsize(path) / 1e6
+            logger.info(f"{os.path.basename(path)} loaded: {len(result)} rows in {seconds:.2f} s "
+                        f"({len(result)/seconds:.0f} rows/s, {mb/seconds:.1f} MB/s)")
+            yield result
+
+def read_shards(paths, workers=SHARD_WORKERS, **csv_kwargs):
+    #the shards of a CSV dataset read concurrently (csv_kwargs, e.g. usecols and dtype, as in pd.read_csv)
+    #and concatenated once, as the successive pd.concat of the files did
+    frames = list(map_shards(paths, lambda path: pd.read_csv(path, **csv_kwargs), workers))
+    return pd.concat(frames, axis=0) if len(frames) > 0 else pd.DataFrame()
+
+def parquet_columns(path, columns, index_col=None):
+    #the requested columns, with the stored columns of the index (e.g. "prime" in the temperatures datasets)
+    if columns is None:
+        return None
+    metadata = pq.read_schema(path).metadata or {}
+    index_columns = json.loads(metadata[b"pandas"])["index_columns"] if b"pandas" in metadata else []
+    index_columns = [name for name in index_columns if isinstance(name, str)] #a RangeIndex is not stored as a column
+    if index_col is not None and index_col not in index_columns:
+        index_columns = index_columns + [index_col]
+    return [name for name in index_columns if name not in columns] + list(columns)
+
+def float_values(value):
+    #the values of a list column: a list (Parquet) or its repr string (CSV)
+    if isinstance(value, str):
+        return list(map(float, value.replace("[", "").replace("]", "").replace(",", "").split(" ")))
+    return list(map(float, value))
+
+#A list column of floats as one buffer of values and the offsets of the rows (the row k is values[offsets[k]:offsets[k+1]]),
+#so that the lists are loaded once (without parsing from Parquet) and a row is a slice of the buffer
+class RaggedArray:
+    def __init__(self, offsets, values):
+        self.offsets = offsets
+        self.values = values
+
+    @classmethod
+    def from_arrow(cls, array):
+        #array: an Arrow list array (a missing list is an empty row)
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks() if array.num_chunks > 0 else pa.array([], type=array.type)
+        lengths = pc.fill_null(pc.list_value_length(array), 0).to_numpy(zero_copy_only=False)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(offsets, pc.cast(pc.list_flatten(array), pa.float64()).to_numpy(zero_copy_only=False))
+
+    @classmethod
+    def from_series(cls, series):
+        #series: lists or their repr strings (CSV), each parsed once
+        rows = [np.asarray(float_values(x), dtype=np.float64) for x in series]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(row) for row in rows], out=offsets[1:])
+        values = np.concatenate(rows) if len(rows) > 0 else np.zeros(0)
+        return cls(offsets, values)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, k):
+        return self.values[self.offsets[k]:self.offsets[k+1]]
+
+def read_ragged(path, column):
+    #a list column of floats of a dataset (in the order of its rows)
+    if is_csv(path):
+        return RaggedArray.from_series(pd.read_csv(path, usecols=[column])[column])
+    return RaggedArray.from_arrow(pq.read_table(path, columns=[column]).column(column))
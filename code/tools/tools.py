@@ -1,24 +1,24 @@
 import json
+import functools
+from typing import NamedTuple
 import numpy as np
 import pandas as pd
 from loguru import logger
 pd.options.mode.chained_assignment = None
 
 #My generic algorithm for getting all users in a multi-index
+#(the users in the order of their first row, from the codes of the first level of the index)
 def get_users(grouped_data):
-    usershat = []
-    for key, group in grouped_data.index:
-        if key not in usershat:
-            usershat.append(key)
-    return usershat
+    index = grouped_data.index
+    codes = pd.unique(index.codes[0])
+    if (codes >= 0).all():
+        return index.levels[0][codes].tolist()
+    return pd.unique(index.get_level_values(0)).tolist() #missing users (NaN) in the index
 
 #My generic algorithm for getting all users in a single index
+#(the users in the order of their first row)
 def get_users_cycles(grouped_data):
-    usershat = []
-    for key in grouped_data.index:
-        if key not in usershat:
-            usershat.append(key)
-    return usershat
+    return grouped_data.index.unique().tolist()
 
 #Matrix generator for plotting a grid of subplots
 def matrix_generator():
@@ -48,6 +48,38 @@ def load_model_cycle(model_cycle):
     
     return(model_cycles)
 
+#The model cycle and its anchors, computed once instead of for every cycle (immutable, so it can be shared by all cycles)
+class ModelCycle(NamedTuple):
+    values: tuple                 #the model cycle
+    nadir: float                  #the least temperature of the model
+    peak: float                   #the highest temperature of the model
+    nadir_position: int           #the (first) position of the least temperature
+    peak_position: int            #the (first) position of the highest temperature
+    max_position_after_nadir: int #the (first) position of the highest temperature of the other half of the model (from the nadir on)
+
+    @classmethod
+    def from_values(cls, model_cycle):
+        values = tuple(model_cycle)
+        nadir = min(values)
+        peak = max(values)
+        nadir_position = values.index(nadir)
+        other_half = values[nadir_position:]
+        return cls(values, nadir, peak, nadir_position, values.index(peak), values.index(max(other_half)))
+
+#The model cycle as a ModelCycle: a ModelCycle is returned as it is, a list of values is converted, 
+#and a file is loaded (once per process) and model_cycle[key] is converted
+def model_cycle_anchors(model_cycle, key=None):
+    if isinstance(model_cycle, ModelCycle):
+        return model_cycle
+    if isinstance(model_cycle, str):
+        return load_model_cycle_anchors(model_cycle, key)
+    return ModelCycle.from_values(model_cycle)
+
+#Loading the model cycle and computing its anchors once per process
+@functools.lru_cache(maxsize=None)
+def load_model_cycle_anchors(model_cycle, key):
+    return ModelCycle.from_values(load_model_cycle(model_cycle)[key])
+
 def save_model_cycle(model_cycle, OUTPUT):
     try:
         with open(OUTPUT, "w") as f:
@@ -55,6 +87,27 @@ def save_model_cycle(model_cycle, OUTPUT):
     except Exception as ex:
         print("Error while saving object:", ex)
 
+#Runs of consecutive missing days in a single pass
+def missing_day_runs(missing_day, max_gap=10):
+    #missing_day: whether each (consecutive) day is missing
+    #returns the label of the run of each day (0 for recorded days, then 1, 2, ...), the length of the run of each day 
+    #(0 for recorded days) and the position of the first day of the first run longer than max_gap (None if there is none)
+    missing = np.asarray(missing_day, dtype=bool)
+    run_starts = missing & ~np.concatenate(([False], missing[:-1]))
+    run_labels = np.cumsum(run_starts) * missing
+    run_lengths = np.bincount(run_labels)[run_labels] * missing
+    long_gaps = np.flatnonzero(run_lengths > max_gap)
+    cut = long_gaps[0] if len(long_gaps) > 0 else None
+    return run_labels, run_lengths, cut
+
+#Adding the "Missing_length" of each day and dropping all recordings after the first run of more than max_gap missing days
+def drop_after_missing_gap(temperature_vals, max_gap=10):
+    _, run_lengths, cut = missing_day_runs(temperature_vals["Missing_Day"] == True, max_gap)
+    temperature_vals["Missing_length"] = run_lengths
+    if cut is not None:
+        temperature_vals = temperature_vals.iloc[0:cut] #drop all recordings after max_gap missing days
+    return temperature_vals
+
 #Plotting layout
 def fig_layout():
     return plt.figure()
@@ -69,6 +122,26 @@ def length_of_line(yaxis, xaxis):
         d+=s
     return d
 
+#Reductions over the segments of a sorted array (the segment k is values[starts[k]:starts[k+1]], none empty),
+#with the results of np.min, np.max, np.median and np.ptp on every segment (a NaN in a segment gives NaN)
+def segment_min(values, starts):
+    return np.minimum.reduceat(values, starts)
+
+def segment_max(values, starts):
+    return np.maximum.reduceat(values, starts)
+
+def segment_ptp(values, starts):
+    return segment_max(values, starts) - segment_min(values, starts)
+
+def segment_median(values, starts):
+    counts = np.diff(np.append(starts, len(values)))
+    segments = np.repeat(np.arange(len(starts)), counts)
+    sorted_values = values[np.lexsort((values, segments))] #sorted within every segment
+    median = (sorted_values[starts + (counts - 1) // 2] + sorted_values[starts + counts // 2]) / 2
+    if np.issubdtype(values.dtype, np.floating):
+        median[np.maximum.reduceat(np.isnan(values), starts)] = np.nan
+    return median
+
 #Custom algorithm for getting the amount of warping
 def warp_degree(path_x, path_y):
     mag = []
@@ -88,6 +161,27 @@ def users_btw_3_and_10(cycles):
     users_10_cycles = get_users_cycles(users_less_10) #now get the the users
     return users_10_cycles
 
+#The PCOS labels of the questionnaire answers: 1 - PCOS, 0 - an answer to the infertility question without PCOS,
+#2 - no response to the infertility question (and 3 for the users without questionnaire data, after the merge with the cycles)
+PCOS_DIAGNOSIS = "Polycystic Ovarian Syndrome (PCOS)"
+INFERTILITY_QUESTION = "Have you ever gone to a doctor because you thought you were infertile?"
+NO_QUESTIONNAIRE_PCOS = 3
+
+def pcos_labels(df):
+    #df: the cleaned questionnaire with the diagnoses in the "PCOS" column
+    conditions = [
+        df["PCOS"] == PCOS_DIAGNOSIS,           # One person indicated PCOS but didnt answer "Yes" to infertility
+        df[INFERTILITY_QUESTION] == "Yes",      # Those that answered yes to infertility but do not have PCOS
+        df[INFERTILITY_QUESTION] == "No",       # Some answered "No" to infertility in the "Yes" column
+        df["Unnamed: 676"] == "No"              # Those that indicated "No to infertility"
+    ]
+    return np.select(conditions, [1, 0, 0, 0], default=2) # Those with no response to infertility question
+
+def fill_missing_pcos(pcos):
+    #pcos: the PCOS labels of the cycles merged with the questionnaire (missing for the users without questionnaire data)
+    values = pcos.to_numpy()
+    return pd.Series(np.where(pd.isnull(values), NO_QUESTIONNAIRE_PCOS, values), index=pcos.index, name=pcos.name)
+
 #This algorithm takes out outliers for a normalized data
 def trimming_for_outliers(df):
     logger.info("================Cycle filtering using derived features started==================")
@@ -245,7 +339,7 @@ def get_nadirs_and_peaks(std_temps_list, path, smooth_temps, model_cycle, cycle)
 
     Standard_smooth_temps = std_temps_list
     Standard_path = path
-    model_cycle = model_cycle
+    model_cycle = model_cycle_anchors(model_cycle)
 
     if len(np.where(~(np.isnan(Standard_smooth_temps)))[0]) > 0 :
 
@@ -254,13 +348,10 @@ def get_nadirs_and_peaks(std_temps_list, path, smooth_temps, model_cycle, cycle)
         last = np.where(~np.isnan(Standard_smooth_temps))[0][-1]
         
         #The position of the least on the entire model cycle
-        model_least_position = np.where(np.array(model_cycle) == min(model_cycle))[0][0]
-
-        #The other half of the model after least of the model cycle
-        model_cycle_other_half = model_cycle[model_least_position:]
+        model_least_position = model_cycle.nadir_position
 
-        #The position of the maximum on the entire model cycle
-        model_max_position = np.where(np.array(model_cycle) == max(model_cycle_other_half))[0][0]
+        #The position of the maximum of the other half of the model (after least of the model cycle) on the entire model cycle
+        model_max_position = model_cycle.max_position_after_nadir
 
         #This was don using DTW with missigness. We have reverted to the regular DTW.
         #Corresponding positions of the non NaN values on the model
@@ -497,7 +588,7 @@ def extrapolate_nadir_day(Standard_path, model_cycle, Expanded_smooth_temps, cyc
     least = max([x for x in Standard_path if x[1] == cycle_least_pos])
     
     #Louise's extrapolation algorithm for missing nadirs
-    model_nadir_pos = [i for i,j in enumerate(model_cycle) if j == min(model_cycle)][0]
+    model_nadir_pos = model_cycle_anchors(model_cycle).nadir_position
     cycle_first_record = min([i for i,j in enumerate(Expanded_smooth_temps) if ~np.isnan(j)])
 
     #least reference point warped to cycle
@@ -516,7 +607,7 @@ def extrapolate_peak_day(Standard_path, model_cycle, Expanded_smooth_temps, cycl
     maximum = min([x for x in Standard_path if x[1] == cycle_max_pos])
 
     #Adaptation of Louise's extrapolation algorithm for missing nadirs for obtaining missing peaks
-    model_peak_pos = [i for i,j in enumerate(model_cycle) if j == max(model_cycle)][0]
+    model_peak_pos = model_cycle_anchors(model_cycle).peak_position
     cycle_last_record = max([i for i,j in enumerate(Expanded_smooth_temps) if ~np.isnan(j)])
 
     position_of_last_cycle_warp = [i for i, j in enumerate(Standard_path) if j == maximum][0] #Last warp before many to one
@@ -546,11 +637,12 @@ def extrapolate_peak_day(Standard_path, model_cycle, Expanded_smooth_temps, cycl
 def extrapolate_nadir_temp(Standard_path, model_cycle, Standard_smooth_temps, Expanded_smooth_temps_not_null, Standard_peak_temp, Standard_peak_temp_actual, cycle_least_pos):
     least = max([x for x in Standard_path if x[1] == cycle_least_pos]) #last nadir many-to-one warps
     
+    model_cycle = model_cycle_anchors(model_cycle)
     least_nadir_model = least[0] #Least point on model after one-to-many warps
-    least_nadir_model_temp = model_cycle[least_nadir_model] #Temp of the least point on model after one-to-many warps
+    least_nadir_model_temp = model_cycle.values[least_nadir_model] #Temp of the least point on model after one-to-many warps
 
-    model_peak = max(model_cycle) #Model peak
-    model_nadir = min(model_cycle) #Model nadir
+    model_peak = model_cycle.peak #Model peak
+    model_nadir = model_cycle.nadir #Model nadir
 
     d_1 = model_peak - least_nadir_model_temp #Difference btw model last warp and peak temps
     d_2 = model_peak - model_nadir #Difference btw model nadir and peak temps
@@ -578,11 +670,12 @@ def extrapolate_peak_temp(Standard_path, model_cycle, Standard_smooth_temps, Exp
 
     maximum = min([x for x in Standard_path if x[1] == cycle_max_pos]) #First peak many-to-one warps
 
+    model_cycle = model_cycle_anchors(model_cycle)
     least_peak_model = maximum[0] #Least point on model before one-to-many warps
-    least_peak_model_temp = model_cycle[least_peak_model] #Temp of the least point on model before one-to-many warps
+    least_peak_model_temp = model_cycle.values[least_peak_model] #Temp of the least point on model before one-to-many warps
 
-    model_peak = max(model_cycle) #Model peak
-    model_nadir = min(model_cycle) #Model nadir
+    model_peak = model_cycle.peak #Model peak
+    model_nadir = model_cycle.nadir #Model nadir
 
     d_1 = least_peak_model_temp - model_nadir #Difference btw model last warp and peak temps
     d_2 = model_peak - model_nadir #Difference btw model nadir and peak temps
@@ -23,6 +23,7 @@ from classes.strat_k_fold import StratKFold
 from tools.classifier_roc_cross_val import classifier_roc_cross_val
 from tools.classifier_importance import plot_importance
 from tools.classifier_importance import shap_explainer
+import tools.storage as storage
 
 parser = argparse.ArgumentParser(description= "A script to filter data")
 parser.add_argument('-i', '--input_file_1', type=str, required=True, help= 'The user level input dataset')
@@ -33,7 +34,7 @@ parser.add_argument('-o', '--output_folder', type=str, required=True, help= 'The
 def user_level_learning(INPUT_1, INPUT_2, SPLITS, OUTPUT):
     #reading the data - user variables
     logger.info("Reading user level variables for learning")
-    df_user_level_features = pd.read_csv(INPUT_1) 
+    df_user_level_features = storage.read_frame(INPUT_1) 
     renaming = {"med_pair_distances":"Median of paired distances","med_pair_lengths":"Median of paired curve lengths",
 
     "min_Data_Length":"Minimum data length",
@@ -120,7 +121,7 @@ def user_level_learning(INPUT_1, INPUT_2, SPLITS, OUTPUT):
 
     #reading the data - questionnaire variables
     logger.info("Reading questionnaire level variables for learning")
-    df_quest = pd.read_csv(INPUT_2) 
+    df_quest = storage.read_frame(INPUT_2) 
     logger.info("Dataset read")
     #Replace missing values with NaN
     df_quest = preprocess.clean_null_responses(df_quest)
@@ -7,14 +7,14 @@ class Learning:
         ############################################################################################
     ### For Rule 10 (get_learning_variables) - 
     ### 1. The first input is the file containing the preprocessed data - the output of 
-    ### cycle_level_data (rule 9) i.e. features_dtw_SS.csv
-    ### 2. The second input is the cleaned questionnaire data - from Rule 7 (process_questionnaire) i.e df_questionnaire_final.csv
+    ### cycle_level_data (rule 9) i.e. features_dtw_SS.parquet
+    ### 2. The second input is the cleaned questionnaire data - from Rule 7 (process_questionnaire) i.e df_questionnaire_final.parquet
     ### 3. The third input is the output of the model cycle from rule 8 (model_cycle) i.e model_cycle.json                                                                  
     ### 4. The first output file is to save the cycle-level variables
     ### 5. The second output file is to save the questionnaire variables
         ############################################################################################"
-    get_learning_variables_output_temps =  "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/features_learning.csv"
-    get_learning_variables_output_quest = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/df_questionnaire_ml.csv"
+    get_learning_variables_output_temps =  "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/features_learning.parquet"
+    get_learning_variables_output_quest = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/df_questionnaire_ml.parquet"
     #get_learning_variables_output =  "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/features_learning_MM.csv"
 
         ############################################################################################
@@ -33,7 +33,7 @@ class Learning:
     ###  - the output of get_learning_variables (rule 10)                                                                    
     ### 2. Specify the output file to save the user-level variables
         ############################################################################################"
-    user_level_variables_output =  "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/user_level_variables.csv"
+    user_level_variables_output =  "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/user_level_variables.parquet"
 
         ############################################################################################
     ### For Rule 13 (user_level_learning) - 
@@ -47,9 +47,9 @@ class Learning:
 
         ############################################################################################
     ### For Rule 14 (preprocess_quest rule) - 
-    ### 1. The first input is the cleaned questionnaire data - from Rule 7 (process_questionnaire) i.e df_questionnaire_final.csv
+    ### 1. The first input is the cleaned questionnaire data - from Rule 7 (process_questionnaire) i.e df_questionnaire_final.parquet
     ### 2. The second input is the output of the model cycle from rule 8 (model_cycle) i.e model_cycle.json
-    ### 3. The third input is the output of the cycle level features from Rule 9 (cycle_level_data) i.e. features_dtw_SS.csv
+    ### 3. The third input is the output of the cycle level features from Rule 9 (cycle_level_data) i.e. features_dtw_SS.parquet
     ### 4. Specify the output file. This should be a CSV file
         ############################################################################################"
     #get_BMI_input = "/projects/MRC-IEU/research/data/fertility_focus/ovusense/released/2022-11-30/data/uob-questionnaire/OvuSense_Cycle_Characteristics_Study-Survey-to_18NOV22_anon.xlsx"
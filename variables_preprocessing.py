@@ -27,21 +27,22 @@ class Variables:
 
         #############################################################################################
     ### For Rule 3 (merged_decrypted) - 
-    ### 1. The input folder must be the same as the output of rule 2 (the data_decrypt rule)
+    ### 1. The input is the output of rule 1 (the data_clean rule), decoded in Python. The output folder of rule 2 
+    ###     (the data_decrypt rule) is used if the recordings are decrypted with decrypt.js and merged with decrypt_merge_2.py
     ### 2. Define the ouput file. Can be anywhere but the same folder as the previous rule is 
-    ###     reccommended. Note that this is is a CSV file                   
+    ###     reccommended. Note that this is a Parquet file (or a CSV file if it ends with .csv)                   
         #############################################################################################
-    merged_decrypted_output = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/merged_decrypted.csv"  
+    merged_decrypted_output = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/merged_decrypted.parquet"  
 
         #############################################################################################
     ### For Rule 4 (sel_cr_1) -
     ### 1. The input file must be the same as the output of the "merged_decrypted" rule (rule 3)
     ### 2. Define the ouput file. Can be anywhere but the same folder as the previous rule is 
-    ###     reccommended. Note that is is a CSV file  
+    ###     reccommended. Note that is is a Parquet file (or a CSV file if it ends with .csv)  
     ### 3. Define the minimum number of true data (data that is not NaN,34500.0 or 0.0) in each daily record. This is necessary for row validity
     ### 4. Define the data start point (Nightly values before this point will be deleted)                   
         #############################################################################################
-    sel_cr_1_output = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/sel_crt_1.csv"
+    sel_cr_1_output = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/sel_crt_1.parquet"
     min_number_of_true_temp_values = 10
     init_point = 5
 
@@ -49,12 +50,12 @@ class Variables:
     ### For Rule 5 (sel_cr_2) -  
     ### 1. The input file must be the same as the output of the "sel_cr_1" rule (rule 4)
     ### 2. Define the ouput file. Can be anywhere but the same folder as the previous rule is 
-    ###     reccommended. Note that is is a CSV file  
+    ###     reccommended. Note that is is a Parquet file (or a CSV file if it ends with .csv)  
     ### 3. Define the minimum number of total temperature values across all cycles recorded for a user
     ### 4. Define the minimum number of daily temperatures that must be recorded in a cycle
     ### 5. Define the minimum number of cycles that must be recorded for a user                  
         #############################################################################################
-    sel_cr_2_output = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/sel_crt_2.csv"
+    sel_cr_2_output = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/sel_crt_2.parquet"
     min_number_of_total_record_days = 30
     min_days_on_cycle = 10
     min_cycles_for_user = 3
@@ -64,30 +65,30 @@ class Variables:
     ### 1. The first input is the output of the "sel_cr_2" rule (rule 5)
     ### 2. Specify the folder that contains the cycles (the cycle files are prefixed with "allusercycles")
     ### 3. Specify the ouput file. Can be anywhere but the same folder as the previous rule is 
-    ###     reccommended. Note that is is a CSV file                  
+    ###     reccommended. Note that is is a Parquet file (or a CSV file if it ends with .csv)                  
         #############################################################################################
     process_cycles_input_folder = "/projects/MRC-IEU/research/data/fertility_focus/ovusense/released/2022-11-30/data/temperature/"
-    process_cycles_output = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/temp_dates_duration.csv"
+    process_cycles_output = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/temp_dates_duration.parquet"
 
       #############################################################################################
     ### For Rule 7 (process_quest) - 
     ### 1. The first input is the questionnaire data (This is an excel file)
     ### 2. The second input is the output of the "process_cycles" rule (rule 6)
     ### 3. Specify the ouput file for temperatures and duration. Can be anywhere but the same folder as the previous rule is 
-    ###     reccommended. Note that is is a CSV file
+    ###     reccommended. Note that is is a Parquet file (or a CSV file if it ends with .csv)
     ### 4. Specify the ouput file for cleaned questionnaire       
         #############################################################################################
     #process_quest_input_file = "/projects/MRC-IEU/research/data/fertility_focus/ovusense/released/2022-11-30/data/uob-questionnaire/OvuSense_Cycle_Characteristics_Study-Survey-to_18NOV22_anon.xlsx"
     #process_quest_output = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/temp_dates_duration_pcos.csv"
     process_quest_input_file = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/Olalekan_OvuSense_Cycle_Characteristics_Study-Survey-to_18NOV22_anon.xlsx"
-    process_quest_temps_dur = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/temp_dates_duration_pcos.csv"
-    process_quest_cleaned = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/df_questionnaire_final.csv"
+    process_quest_temps_dur = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/temp_dates_duration_pcos.parquet"
+    process_quest_cleaned = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/df_questionnaire_final.parquet"
 
         #############################################################################################
     ### For Rule 8 (model_cycle) - 
     ### 1. The first input is the questionnaire data (This is an excel file)
-    ### 2. The second input is the cycles data obtained from rule 6 (process_cycles) i.e. temp_dates_duration.csv
-    ### 3. The third input is the user daily tempertatures records obtained form rule 5 (sel_cr_2) i.e sel_cr_2.csv
+    ### 2. The second input is the cycles data obtained from rule 6 (process_cycles) i.e. temp_dates_duration.parquet
+    ### 3. The third input is the user daily tempertatures records obtained form rule 5 (sel_cr_2) i.e sel_cr_2.parquet
     ### 4. Specify the file to save the outputs. Note that this is a file
         #############################################################################################
     model_cycle_quest_input_file = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/Olalekan_OvuSense_Cycle_Characteristics_Study-Survey-to_18NOV22_anon.xlsx"
@@ -97,13 +98,13 @@ class Variables:
         #############################################################################################
     ### For Rule 9 (cycle_level_data) - 
     ### 1. The first input is the temperature data set - the output of the "sel_cr_2" rule (rule 5)
-    ### 2. The second input is the cycles dataset with PCOS column - One of the outputs of the "process_questionnaire (temp_dates_duration_pcos.csv)" rule (rule 7)
+    ### 2. The second input is the cycles dataset with PCOS column - One of the outputs of the "process_questionnaire (temp_dates_duration_pcos.parquet)" rule (rule 7)
     ### 3. The location of the model cycle - output of rule 8  
     ### 4. Specify the ouput file. Can be anywhere but the same folder as the previous rule is 
-    ###     reccommended. Note that is is a CSV file    
+    ###     reccommended. Note that is is a Parquet file (or a CSV file if it ends with .csv)    
         #############################################################################################
     #model_cycle = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/model.json"
-    cycle_level_data_output = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/features_dtw_SS.csv"
+    cycle_level_data_output = "/projects/MRC-IEU/research/projects/ieu2/p6/063/working/data/results/features_dtw_SS.parquet"
 
 
 #######################################You do not need to edit aything beyond this point#######################################
@@ -129,6 +130,7 @@ class Variables:
     merged_decrypted_output_file = merged_decrypted_output
     merged_decrypted = {
         "input_folder":merged_decrypted_input_folder,
+        "input_file":data_clean_output_file, #decoded by decode_recordings.py
         "output_file":merged_decrypted_output_file
     }
 